@@ -0,0 +1,27 @@
+"""Замер времени работы filter_by_date_range на синтетических данных от 10 тыс. до 5 млн строк.
+
+Запуск из корня проекта: python -m benchmarks.bench_filter_by_date_range
+"""
+
+import logging
+from time import perf_counter
+
+from benchmarks.generator import make_operations
+from src.utils import filter_by_date_range
+
+SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+
+
+def main() -> None:
+    logging.disable(logging.CRITICAL)
+    print(f"{'строк':>10} {'секунд':>10} {'строк/с':>14}")
+    for rows in SIZES:
+        df = make_operations(rows)
+        start = perf_counter()
+        filter_by_date_range(df, "2021-12-20 06:20:03")
+        elapsed = perf_counter() - start
+        print(f"{rows:>10} {elapsed:>10.3f} {rows / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Сравнение расчета карт и Топ-5 для страницы «Главная»: прежний путь (filter_by_date_range,
+get_card_information со своей фильтрацией и get_top_transactions_by_amount) и get_home_page_sections за один проход.
+Замеряются время и пик памяти (tracemalloc) на синтетических выгрузках с типизированными столбцами.
+
+Запуск из корня проекта: python -m benchmarks.bench_home_page
+"""
+
+import logging
+import tracemalloc
+from time import perf_counter
+from typing import Any, Callable
+
+import pandas as pd
+
+from benchmarks.generator import make_operations
+from src.result_cache import result_cache
+from src.schema import apply_transaction_schema
+from src.utils import (filter_by_date_range, get_card_information, get_home_page_sections,
+                       get_top_transactions_by_amount)
+
+SIZES = [100_000, 1_000_000, 5_000_000]
+DATE = "2021-12-20 06:20:03"
+
+
+def separate_sections(df: pd.DataFrame) -> tuple[list[dict], list[dict]]:
+    """Прежний путь: каждый раздел отдельно фильтрует данные"""
+    window = filter_by_date_range(df, DATE)
+    return get_card_information(df, DATE), get_top_transactions_by_amount(window)
+
+
+def measure(function: Callable[[], Any]) -> tuple[float, int, Any]:
+    """Возвращает время работы (секунды), пик памяти (байты) и результат функции"""
+    tracemalloc.start()
+    start = perf_counter()
+    result = function()
+    elapsed = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main() -> None:
+    logging.disable(logging.CRITICAL)
+    result_cache.enabled = False
+    print(f"{'строк':>10} {'раздельно, с':>14} {'один проход, с':>15} {'раздельно, МБ':>14} {'один проход, МБ':>16}")
+    for rows in SIZES:
+        df = apply_transaction_schema(make_operations(rows))
+        separate_time, separate_peak, expected = measure(lambda: separate_sections(df))
+        fused_time, fused_peak, result = measure(lambda: get_home_page_sections(df, DATE))
+        assert result == expected
+        print(
+            f"{rows:>10} {separate_time:>14.3f} {fused_time:>15.3f} "
+            f"{separate_peak / 2**20:>14.1f} {fused_peak / 2**20:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
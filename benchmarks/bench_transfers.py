@@ -0,0 +1,56 @@
+"""Сравнение поиска переводов физ. лицам: построчный .str.match и TransferMatcher (по уникальным описаниям).
+
+Запуск из корня проекта: python -m benchmarks.bench_transfers
+"""
+
+import logging
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from src.schema import apply_transaction_schema
+from src.services import DEFAULT_TRANSFER_MATCHER, TRANSFER_PATTERN
+
+SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+NAMES = ["Дмитрий", "Анна", "Сергей", "Ольга", "Иван", "Мария", "Павел", "Елена"]
+OTHER = ["Перевод Кредитная карта. ТП 10.2 RUR", "Перевод с карты", "Пополнение через Газпромбанк", "Сидоров."]
+
+
+def make_transfers(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Формирует DataFrame категории «Переводы» с описаниями из ограниченного набора (как в выгрузке банка)"""
+    rng = np.random.default_rng(seed)
+    names = [f"{name} {letter}." for name in NAMES for letter in "АБВГДЕЖЗИКЛМНОПРСТУФ"]
+    descriptions = np.array(names + OTHER, dtype=object)
+    return pd.DataFrame(
+        {
+            "Категория": "Переводы",
+            "Описание": descriptions[rng.integers(0, len(descriptions), rows)],
+        }
+    )
+
+
+def timed(function, *args) -> tuple[float, object]:
+    """Возвращает время работы функции в секундах и ее результат"""
+    start = perf_counter()
+    result = function(*args)
+    return perf_counter() - start, result
+
+
+def main() -> None:
+    logging.disable(logging.CRITICAL)
+    print(f"{'строк':>10} {'str.match':>10} {'object':>10} {'pyarrow':>10} {'category':>10}")
+    for rows in SIZES:
+        df = make_transfers(rows)
+        typed = apply_transaction_schema(df)
+        baseline, expected = timed(lambda s: s.str.match(TRANSFER_PATTERN, na=False).to_numpy(), df["Описание"])
+        timings = []
+        for descriptions in [df["Описание"], typed["Описание"], typed["Описание"].astype("category")]:
+            elapsed, result = timed(DEFAULT_TRANSFER_MATCHER.mask, descriptions)
+            assert np.array_equal(result, expected)
+            timings.append(elapsed)
+        print(f"{rows:>10} {baseline:>10.3f} " + " ".join(f"{elapsed:>10.3f}" for elapsed in timings))
+
+
+if __name__ == "__main__":
+    main()
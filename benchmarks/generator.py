@@ -0,0 +1,125 @@
+"""Генератор синтетических выгрузок операций: те же столбцы, что и в data/operations.xlsx,
+распределения категорий, описаний, карт и сумм близки к реальной выгрузке."""
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+]
+
+# категория: (доля операций, MCC, типичная сумма, доля поступлений, описания)
+CATEGORIES = {
+    "Супермаркеты": (0.34, 5411, 250, 0.0, ["Колхоз", "Магнит", "Пятёрочка", "Перекрёсток", "ВкусВилл", "Лента"]),
+    "Фастфуд": (0.19, 5814, 180, 0.0, ["Mouse Tail", "Вкусно и точка", "Burger King", "KFC", "Теремок"]),
+    "Транспорт": (0.06, 4111, 60, 0.0, ["Метро Санкт-Петербург", "Яндекс Такси", "Транспорт Москвы"]),
+    "Переводы": (0.05, None, 2000, 0.3, ["Перевод Кредитная карта. ТП 10.2 RUR", "Перевод с карты"]),
+    "Ж/д билеты": (0.04, 4112, 1500, 0.0, ["РЖД", "Ласточка", "ЦППК"]),
+    "Различные товары": (0.04, 5399, 900, 0.0, ["Ozon.ru", "Wildberries", "AliExpress"]),
+    "Связь": (0.03, 4814, 400, 0.0, ["МТС", "Билайн", "Тинькофф Мобайл"]),
+    "Пополнения": (0.03, None, 5000, 1.0, ["Пополнение через Газпромбанк", "Внесение наличных через банкомат"]),
+    "Аптеки": (0.02, 5912, 500, 0.0, ["Аптека Вита", "Ригла", "Планета Здоровья"]),
+    "Каршеринг": (0.02, 7512, 700, 0.0, ["Ситидрайв", "Делимобиль", "Яндекс Драйв"]),
+    "Рестораны": (0.02, 5812, 1800, 0.0, ["Pho Bo", "Шоколадница", "Тануки"]),
+    "Бонусы": (0.015, None, 100, 1.0, ["Кешбэк за обычные покупки", "Бонус за привязку"]),
+    "Наличные": (0.015, 6011, 3000, 0.0, ["Снятие в банкомате Тинькофф", "Снятие в банкомате Сбербанка"]),
+    "Дом и ремонт": (0.015, 5200, 1200, 0.0, ["Леруа Мерлен", "OBI", "Петрович"]),
+    "ЖКХ": (0.01, 4900, 6000, 0.0, ["ЖКУ Квартира", "Мосэнергосбыт"]),
+    "Госуслуги": (0.005, 9311, 1500, 0.0, ["Почта России", "Госуслуги"]),
+    "Развлечения": (0.01, 7999, 1000, 0.0, ["sevs.eduerp.ru", "Парк Горького"]),
+    None: (0.12, None, 3000, 0.2, ["Перевод с карты", "Перевод средств с брокерского счета"]),
+}
+CARDS = ["*7197", "*4556", "*5091", "*5441", "*1112", "*5507", "*6002", None]
+CARD_WEIGHTS = [0.72, 0.17, 0.008, 0.002, 0.001, 0.0005, 0.0005, 0.098]
+CURRENCIES = ["RUB", "TRY", "EUR", "CNY", "USD"]
+CURRENCY_WEIGHTS = [0.98, 0.011, 0.0045, 0.0027, 0.0018]
+FIRST_NAMES = ["Дмитрий", "Анна", "Сергей", "Ольга", "Иван", "Мария", "Павел", "Елена", "Валерий", "Светлана"]
+
+
+def _format_bank_dates(seconds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Переводит секунды от начала эпохи в строки дат операции и платежа в формате выгрузки банка.
+    Строки собираются из заранее отформатированных дней и времени суток - на порядок быстрее strftime"""
+    days, time_of_day = np.divmod(seconds, 86400)
+    first_day = days.min() if len(days) else 0
+    day_strings = pd.to_datetime(np.arange(first_day, days.max() + 1 if len(days) else 0), unit="D").strftime(
+        "%d.%m.%Y"
+    )
+    day_strings = np.asarray(day_strings, dtype=object)
+    time_strings = np.asarray(pd.to_datetime(np.arange(86400), unit="s").strftime(" %H:%M:%S"), dtype=object)
+    payment_dates = day_strings[days - first_day]
+    return payment_dates + time_strings[time_of_day], payment_dates
+
+
+def make_operations(
+    rows: int,
+    seed: int = 0,
+    start: str = "2018-01-01 00:00:00",
+    end: str = "2021-12-31 23:59:59",
+    as_strings: bool = True,
+) -> pd.DataFrame:
+    """Формирует DataFrame из rows операций со столбцами выгрузки банка.
+    Даты операций равномерно распределены между start и end и (при as_strings=True) записаны строками,
+    как в xlsx-файле.
+    Около половины переводов - переводы физ. лицам с описанием вида «Имя Ф.»"""
+    rng = np.random.default_rng(seed)
+    names = list(CATEGORIES)
+    weights = np.array([CATEGORIES[name][0] for name in names])
+    category_codes = rng.choice(len(names), rows, p=weights / weights.sum())
+
+    transfer_names = [f"{name} {letter}." for name in FIRST_NAMES for letter in "АБВГДЕЖЗИКЛМНОПРСТ"]
+    pools = [CATEGORIES[name][4] + (transfer_names if name == "Переводы" else []) for name in names]
+    pool_offsets = np.cumsum([0] + [len(pool) for pool in pools])
+    all_descriptions = np.array([description for pool in pools for description in pool], dtype=object)
+    pool_sizes = np.diff(pool_offsets)[category_codes]
+    description_index = pool_offsets[category_codes] + (rng.random(rows) * pool_sizes).astype(np.int64)
+
+    typical = np.array([CATEGORIES[name][2] for name in names], dtype=float)[category_codes]
+    income_share = np.array([CATEGORIES[name][3] for name in names])[category_codes]
+    amounts = np.round(rng.lognormal(np.log(typical), 0.8), 2)
+    amounts = np.where(rng.random(rows) < income_share, amounts, -amounts)
+
+    start_ts, end_ts = pd.Timestamp(start).value // 10**9, pd.Timestamp(end).value // 10**9
+    seconds = np.sort(rng.integers(start_ts, end_ts, rows))[::-1]
+    if as_strings:
+        dates, payment_dates = _format_bank_dates(seconds)
+    else:
+        dates = pd.to_datetime(seconds, unit="s")
+        payment_dates = dates.normalize()
+
+    mcc = np.array([CATEGORIES[name][1] or np.nan for name in names], dtype=float)[category_codes]
+    cashback = np.where(rng.random(rows) < 0.1, np.round(np.abs(amounts) / 100, 2), np.nan)
+    currency = np.array(CURRENCIES, dtype=object)[rng.choice(len(CURRENCIES), rows, p=CURRENCY_WEIGHTS)]
+    return pd.DataFrame(
+        {
+            "Дата операции": dates,
+            "Дата платежа": payment_dates,
+            "Номер карты": np.array(CARDS, dtype=object)[rng.choice(len(CARDS), rows, p=CARD_WEIGHTS)],
+            "Статус": np.where(rng.random(rows) < 0.994, "OK", "FAILED").astype(object),
+            "Сумма операции": amounts,
+            "Валюта операции": currency,
+            "Сумма платежа": amounts,
+            "Валюта платежа": "RUB",
+            "Кэшбэк": cashback,
+            "Категория": np.array(names, dtype=object)[category_codes],
+            "MCC": mcc,
+            "Описание": all_descriptions[description_index],
+            "Бонусы (включая кэшбэк)": np.floor(np.abs(np.minimum(amounts, 0)) / 100).astype(np.int64),
+            "Округление на инвесткопилку": np.zeros(rows, dtype=np.int64),
+            "Сумма операции с округлением": np.abs(amounts),
+        },
+        columns=COLUMNS,
+    )
@@ -0,0 +1,169 @@
+"""Набор замеров производительности основных функций на синтетических выгрузках от 10 тыс. до 10 млн строк.
+
+Результаты сохраняются в benchmarks/results/<время>_<коммит>.json и сравниваются с предыдущим запуском.
+
+Запуск из корня проекта:
+    python -m benchmarks.suite                              # 10 тыс., 100 тыс., 1 млн строк
+    python -m benchmarks.suite --sizes 10000 10000000       # свои размеры
+    python -m benchmarks.suite --compare benchmarks/results/<файл>.json --fail-on-regression
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from benchmarks.generator import make_operations
+from src.reports import compute_spending_by_weekday
+from src.result_cache import result_cache
+from src.services import search_transfers_to_individuals
+from src.utils import export_data_from_xlsx, filter_by_date_range, get_card_information, get_top_transactions_by_amount
+
+SIZES = [10_000, 100_000, 1_000_000]
+XLSX_MAX_ROWS = 100_000
+DATE = "2021-12-20 06:20:03"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+REGRESSION_THRESHOLD = 1.2
+
+
+def get_benchmarks(df: pd.DataFrame, xlsx_file: Optional[str]) -> dict[str, Callable[[], Any]]:
+    """Возвращает замеряемые вызовы для одного DataFrame (чтение xlsx - только для небольших размеров)"""
+    benchmarks = {
+        "filter_by_date_range": lambda: filter_by_date_range(df, DATE),
+        "get_card_information": lambda: get_card_information(df, DATE),
+        "get_top_transactions_by_amount": lambda: get_top_transactions_by_amount(df),
+        "spending_by_weekday": lambda: compute_spending_by_weekday(df, DATE),
+        "search_transfers_to_individuals": lambda: search_transfers_to_individuals(df),
+    }
+    if xlsx_file is not None:
+        benchmarks["export_data_from_xlsx"] = lambda: export_data_from_xlsx(xlsx_file)
+    return benchmarks
+
+
+def measure(function: Callable[[], Any], repeat: int) -> list[float]:
+    """Возвращает время repeat запусков функции в секундах"""
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def git_commit() -> str:
+    """Возвращает короткий хэш текущего коммита (или unknown вне git-репозитория)"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_suite(sizes: list[int], repeat: int = 3, only: Optional[list[str]] = None) -> dict:
+    """Запускает все замеры для каждого размера и возвращает результаты с описанием окружения"""
+    results = []
+    for rows in sizes:
+        df = make_operations(rows)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            xlsx_file = None
+            if rows <= XLSX_MAX_ROWS and (only is None or "export_data_from_xlsx" in only):
+                xlsx_file = os.path.join(tmp_dir, "operations.xlsx")
+                df.to_excel(xlsx_file, index=False)
+            for name, function in get_benchmarks(df, xlsx_file).items():
+                if only is not None and name not in only:
+                    continue
+                timings = measure(function, repeat)
+                results.append(
+                    {
+                        "benchmark": name,
+                        "rows": rows,
+                        "min": min(timings),
+                        "median": statistics.median(timings),
+                        "timings": timings,
+                    }
+                )
+                print(f"{name:>34} {rows:>10} {min(timings):>10.4f} {rows / min(timings):>14,.0f}")
+    return {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def save_results(report: dict, results_dir: str = RESULTS_DIR) -> str:
+    """Сохраняет результаты в JSON-файл с временем запуска и коммитом в имени и возвращает путь к нему"""
+    os.makedirs(results_dir, exist_ok=True)
+    created = report["created"].replace(":", "").replace("-", "")
+    file_name = os.path.join(results_dir, f"{created}_{report['commit']}.json")
+    with open(file_name, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    return file_name
+
+
+def latest_results(results_dir: str = RESULTS_DIR, exclude: Optional[str] = None) -> Optional[str]:
+    """Возвращает путь к последнему сохраненному файлу результатов"""
+    files = sorted(path for path in glob.glob(os.path.join(results_dir, "*.json")) if path != exclude)
+    return files[-1] if files else None
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> list[dict]:
+    """Сравнивает минимальное время замеров с базовым запуском.
+    Замер считается регрессией, если он медленнее базового больше чем в threshold раз"""
+    base = {(item["benchmark"], item["rows"]): item["min"] for item in baseline["results"]}
+    comparison = []
+    for item in current["results"]:
+        key = (item["benchmark"], item["rows"])
+        if key in base and base[key] > 0:
+            ratio = item["min"] / base[key]
+            comparison.append({"benchmark": key[0], "rows": key[1], "ratio": ratio, "regression": ratio > threshold})
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замеры производительности на синтетических выгрузках")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="количество строк")
+    parser.add_argument("--repeat", type=int, default=3, help="количество повторов каждого замера")
+    parser.add_argument("--only", nargs="+", help="запустить только указанные замеры")
+    parser.add_argument("--compare", help="файл результатов для сравнения (по умолчанию - предыдущий запуск)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="допустимое замедление")
+    parser.add_argument("--fail-on-regression", action="store_true", help="завершиться с кодом 1 при регрессии")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    result_cache.enabled = False
+    print(f"{'замер':>34} {'строк':>10} {'секунд':>10} {'строк/с':>14}")
+    report = run_suite(args.sizes, args.repeat, args.only)
+    file_name = save_results(report)
+    print(f"Результаты сохранены в {file_name}")
+
+    baseline_file = args.compare or latest_results(exclude=file_name)
+    if baseline_file is None:
+        return
+    with open(baseline_file, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"Сравнение с {baseline_file} (коммит {baseline['commit']}):")
+    comparison = compare_results(baseline, report, args.threshold)
+    for item in comparison:
+        mark = "  РЕГРЕССИЯ" if item["regression"] else ""
+        print(f"{item['benchmark']:>34} {item['rows']:>10} {item['ratio']:>8.2f}x{mark}")
+    if args.fail_on_regression and any(item["regression"] for item in comparison):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,89 @@
-import os
-from src.views import get_data_for_home_page
-from src.utils import filter_by_date_range, export_data_from_xlsx
-from src.reports import spending_by_weekday
-from src.services import search_transfers_to_individuals
-
-
-def main():
-    """Главная функция приложения"""
-    answer_user = int(
-        input(
-            """Привет! Добро пожаловать в программу работы с банковскими транзакциями.
-Выберите необходимый пункт меню:
-    1. Получить информацию к страницы Главная 
-    2. Получить информацию о переводах физ. лицам
-    3. Получить отчет по тратам по дням недели за три последних месяца от указанной даты\n"""
-        )
-    )
-
-    transaction = export_data_from_xlsx(
-        r"data\operations.xlsx")
-
-    if answer_user == 1:
-        print('''Уточните за какой месяц нужно вывести информацию? (дата вводится в формате  YYYY-MM-DD HH:MM:SS - 
-указывайте по какой день нужна информация с начала месяца)
-(Если вас интересует текущий месяц, оставьте поле пустым)\n''')
-        date = input()
-        result = get_data_for_home_page(date)
-
-    elif answer_user == 2:
-
-        services = input("Информация нужна за определенный месяц? да/нет").lower()
-
-        if services == 'да':
-            date_ser = input('''Введите конечную дату, по которую будет выводиться информация с начала указанного месяца
-                             (дата вводится в формате  YYYY-MM-DD HH:MM:SS)\n''')
-            transaction = filter_by_date_range(transaction, date_ser)
-
-        result = search_transfers_to_individuals(transaction)
-
-    else:
-        date_report = input("""Уточните за какие  месяц нужно вывести информацию? (дата вводится в формате  YYYY-MM-DD HH:MM:SS - 
-указывайте по какой день нужна информация за последние 3 месяца)
-(Если вас интересует текущий месяц, оставьте поле пустым)\n""")
-        result = spending_by_weekday(transaction, date_report)
-
-    print(result)
+import argparse
+import sys
+from datetime import datetime
+from typing import Optional
+
+from src.config import OPERATIONS_FILE
+
+
+def run_home(args: argparse.Namespace) -> str:
+    """Информация для страницы «Главная» с начала месяца по указанную дату"""
+    from src.views import get_data_for_home_page
+
+    return get_data_for_home_page(args.date or datetime.now().strftime("%Y-%m-%d %H:%M:%S"), args.file)
+
+
+def run_transfers(args: argparse.Namespace) -> str:
+    """Переводы физ. лицам (за месяц по указанную дату или за все время)"""
+    from src.services import search_transfers_to_individuals
+    from src.storage import closing_store, load_transaction_store
+
+    with closing_store(load_transaction_store(args.file)) as transactions:
+        if isinstance(transactions, str):
+            return transactions
+        return search_transfers_to_individuals(transactions, args.date)
+
+
+def run_weekday(args: argparse.Namespace) -> str:
+    """Отчет по тратам по дням недели за три последних месяца от указанной даты"""
+    from src.reports import spending_by_weekday
+    from src.storage import closing_store, load_transaction_store
+
+    with closing_store(load_transaction_store(args.file)) as transactions:
+        if isinstance(transactions, str):
+            return transactions
+        return spending_by_weekday(transactions, args.date)
+
+
+def run_anomalies(args: argparse.Namespace) -> str:
+    """Необычные траты (за месяц по указанную дату или за все время) по скользящим статистикам всей истории"""
+    from src.anomalies import search_anomalies
+    from src.storage import closing_store, load_transaction_store
+
+    with closing_store(load_transaction_store(args.file)) as transactions:
+        if isinstance(transactions, str):
+            return transactions
+        return search_anomalies(transactions, args.date)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Функция описывает команды и аргументы приложения.
+    Тяжелые модули (pandas, requests, dotenv) импортируются только внутри выбранной команды"""
+    parser = argparse.ArgumentParser(description="Программа работы с банковскими транзакциями")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="команда")
+    date_help = "дата в формате YYYY-MM-DD HH:MM:SS (по умолчанию - текущая)"
+
+    home = commands.add_parser("home", help="информация для страницы «Главная»")
+    home.add_argument("--date", help=date_help)
+    home.add_argument("--file", default=OPERATIONS_FILE, help="xlsx-файл с операциями")
+    home.set_defaults(handler=run_home)
+
+    transfers = commands.add_parser("transfers", help="переводы физ. лицам")
+    transfers.add_argument("--date", help="конечная дата периода с начала месяца (по умолчанию - все время)")
+    transfers.add_argument("--file", default=OPERATIONS_FILE, help="xlsx-файл с операциями")
+    transfers.set_defaults(handler=run_transfers)
+
+    weekday = commands.add_parser("weekday", help="траты по дням недели за три последних месяца")
+    weekday.add_argument("--date", help=date_help)
+    weekday.add_argument("--file", default=OPERATIONS_FILE, help="xlsx-файл с операциями")
+    weekday.set_defaults(handler=run_weekday)
+
+    anomalies = commands.add_parser("anomalies", help="необычные траты: крупные суммы и серии операций")
+    anomalies.add_argument("--date", help="конечная дата периода с начала месяца (по умолчанию - все время)")
+    anomalies.add_argument("--file", default=OPERATIONS_FILE, help="xlsx-файл с операциями")
+    anomalies.set_defaults(handler=run_anomalies)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Главная функция приложения: python main.py home --date "2021-12-31 23:59:59" """
+    args = build_parser().parse_args(argv)
+    if args.date is not None:
+        try:
+            datetime.strptime(args.date, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            sys.exit("Дата должна быть в формате YYYY-MM-DD HH:MM:SS")
+    print(args.handler(args))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation import traced
+from src.logger import logger_setup
+from src.money import to_kopecks, to_rubles
+from src.storage import TransactionStore
+from src.utils import format_dates, get_date_range
+
+logger = logger_setup()
+
+# медиана считается по стольким предыдущим тратам группы, но не меньше чем по MIN_PERIODS
+ROLLING_WINDOW = 30
+MIN_PERIODS = 5
+# трата подозрительна, если она во столько раз больше скользящей медианы
+AMOUNT_THRESHOLD = 3.0
+# серия: не меньше BURST_COUNT трат по карте за BURST_WINDOW
+BURST_WINDOW = pd.Timedelta(minutes=10)
+BURST_COUNT = 5
+ANOMALY_COLUMNS = ["Дата операции", "Номер карты", "Категория", "Описание", "Сумма платежа"]
+LARGE_AMOUNT = "крупная сумма"
+BURST = "серия операций"
+
+
+class AnomalyDetector:
+    """Поиск необычных трат: сумма намного больше скользящей медианы предыдущих трат той же карты и категории
+    (группы задаются by) или серия из многих трат по карте за короткое время.
+    Статистики считаются векторно: медиана - через grouped rolling по данным, отсортированным по группе и дате,
+    количество трат в окне - через searchsorted по ключу «карта, время».
+    Между вызовами update хранится только хвост истории (последние window трат каждой группы и траты
+    каждой карты за burst_window), поэтому новые операции проверяются без пересчета всей истории"""
+
+    def __init__(
+        self,
+        window: int = ROLLING_WINDOW,
+        threshold: float = AMOUNT_THRESHOLD,
+        min_periods: int = MIN_PERIODS,
+        burst_window: pd.Timedelta = BURST_WINDOW,
+        burst_count: int = BURST_COUNT,
+        by: Iterable[str] = ("Номер карты", "Категория"),
+    ) -> None:
+        self.window = window
+        self.threshold = threshold
+        self.min_periods = min_periods
+        self.burst_seconds = int(pd.Timedelta(burst_window).total_seconds())
+        self.burst_count = burst_count
+        self.by = list(by)
+        self._keys = list(dict.fromkeys([*self.by, "Номер карты"]))
+        self._history: Optional[pd.DataFrame] = None
+
+    def _rolling_median(self, frame: pd.DataFrame) -> np.ndarray:
+        """Медиана последних window трат группы до каждой операции (без самой операции), в копейках"""
+        if frame.empty:
+            return np.zeros(0, dtype="float64")
+        group = frame.groupby(self.by, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+        order = np.lexsort((frame["date"].to_numpy(), group))
+        sorted_group = group[order]
+        first = np.r_[True, sorted_group[1:] != sorted_group[:-1]]
+        previous = np.r_[np.nan, frame["kopecks"].to_numpy(dtype="float64")[order][:-1]]
+        previous[first] = np.nan
+        median = (
+            pd.Series(previous)
+            .groupby(sorted_group, sort=False)
+            .rolling(self.window, min_periods=self.min_periods)
+            .median()
+            .reset_index(level=0, drop=True)
+            .sort_index()
+            .to_numpy()
+        )
+        result = np.empty(len(frame))
+        result[order] = median
+        return result
+
+    def _burst_counts(self, frame: pd.DataFrame) -> np.ndarray:
+        """Количество трат по карте за burst_window по момент каждой операции включительно"""
+        if frame.empty:
+            return np.zeros(0, dtype=np.int64)
+        cards = pd.factorize(frame["Номер карты"])[0].astype(np.int64)
+        seconds = frame["date"].to_numpy().astype("datetime64[s]").astype(np.int64)
+        offset = seconds - seconds.min()
+        # карта и время кодируются одним числом, поэтому окна разных карт не пересекаются
+        keys = cards * (int(offset.max()) + self.burst_seconds + 1) + offset
+        sorted_keys = np.sort(keys)
+        counts: np.ndarray = np.searchsorted(sorted_keys, keys, "right") - np.searchsorted(
+            sorted_keys, keys - self.burst_seconds, "left"
+        )
+        return counts
+
+    def _trim(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Оставляет хвост истории, нужный для проверки следующих операций"""
+        latest = frame.groupby(self.by, sort=False, dropna=False, observed=True)["date"].rank(
+            method="first", ascending=False
+        )
+        seconds = frame["date"].to_numpy().astype("datetime64[s]").astype(np.int64)
+        card_last = pd.Series(seconds).groupby(frame["Номер карты"].to_numpy()).transform("max").to_numpy()
+        keep = (latest.to_numpy() <= self.window) | (seconds >= card_last - self.burst_seconds)
+        return frame[keep].reset_index(drop=True)
+
+    def update(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """Функция добавляет новые операции и возвращает необычные траты среди них: столбцы операции,
+        скользящая медиана (rolling_median, руб.), отношение суммы к ней (ratio), количество трат по карте
+        за burst_window (burst_count) и причина (reason). Операции должны поступать в порядке дат"""
+        dates = rows["Дата операции"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+        amounts = rows["Сумма платежа"].to_numpy(dtype="float64", na_value=np.nan)
+        positions = np.flatnonzero((amounts < 0) & dates.notna().to_numpy() & rows["Номер карты"].notna().to_numpy())
+
+        new = pd.DataFrame({key: rows[key].iloc[positions].reset_index(drop=True) for key in self._keys})
+        new["date"] = dates.to_numpy(dtype="datetime64[ns]")[positions]
+        new["kopecks"] = -to_kopecks(amounts[positions])
+        start = 0 if self._history is None else len(self._history)
+        frame = new if self._history is None else pd.concat([self._history, new], ignore_index=True)
+
+        median = self._rolling_median(frame)[start:]
+        burst = self._burst_counts(frame)[start:]
+        self._history = self._trim(frame)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(median > 0, new["kopecks"].to_numpy() / median, np.nan)
+        large = ratio >= self.threshold
+        bursts = burst >= self.burst_count
+        flagged = large | bursts
+        logger.info("Проверено трат: %s, необычных: %s", len(positions), int(flagged.sum()))
+
+        columns = [column for column in ANOMALY_COLUMNS if column in rows.columns]
+        result = rows.iloc[positions[flagged]][columns].copy()
+        result["rolling_median"] = np.round(to_rubles(np.rint(median[flagged])), 2)
+        result["ratio"] = ratio[flagged].round(2)
+        result["burst_count"] = burst[flagged]
+        reasons = np.where(large & bursts, f"{LARGE_AMOUNT}, {BURST}", np.where(large, LARGE_AMOUNT, BURST))
+        result["reason"] = reasons[flagged]
+        return result
+
+
+def detect_anomalies(df: pd.DataFrame, **params: Any) -> pd.DataFrame:
+    """Функция ищет необычные траты по всей истории операций (параметры - как у AnomalyDetector)"""
+    return AnomalyDetector(**params).update(df)
+
+
+@traced()
+def search_anomalies(
+    transactions: pd.DataFrame | TransactionStore, date: Optional[str] = None, count_month: int = 1
+) -> str:
+    """Функция возвращает JSON с необычными тратами: крупными относительно скользящей медианы по карте и категории
+    и сериями операций. Если передана дата, выводятся траты за count_month месяцев по эту дату,
+    а статистики считаются по всей предшествующей истории"""
+    try:
+        start_date, end_date = get_date_range(date, count_month) if date is not None else (None, None)
+        if isinstance(transactions, TransactionStore):
+            logger.info("Выборка истории операций из хранилища")
+            transactions = transactions.filter_by_date_range(None, end_date)
+
+        logger.info("Поиск необычных трат")
+        anomalies = detect_anomalies(transactions)
+        if date is not None:
+            dates = anomalies["Дата операции"]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+            anomalies = anomalies[dates.between(start_date, end_date)]
+        result: str = format_dates(anomalies).to_json(orient="records", force_ascii=False)
+        return result
+    except Exception as e:
+        logger.error("Произошла ошибка %s", e)
+        return f"Произошла ошибка {e}"
@@ -0,0 +1,166 @@
+import argparse
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os.path import splitext
+from time import perf_counter
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from src.cache import load_xlsx_cached
+from src.cashback import CashbackRules, load_cashback_rules
+from src.ingest import collect_statement_files
+from src.logger import logger_setup
+from src.market import fetch_market_data
+from src.reports import compute_spending_by_weekday
+from src.schema import apply_transaction_schema
+from src.services import search_transfers_to_individuals
+from src.utils import get_currency_rates, get_stocks, load_user_settings
+from src.views import build_home_page
+
+logger = logger_setup()
+
+REPORTS = ("home", "weekday", "transfers")
+
+
+def load_statement(file_name: str) -> pd.DataFrame:
+    """Функция читает выписку, приведенную к схеме транзакций. xlsx-файлы читаются через колоночный кэш на диске,
+    поэтому файл разбирается один раз, а остальные процессы и следующие запуски отображают готовый кэш в память"""
+    if splitext(file_name)[1].lower() == ".csv":
+        return apply_transaction_schema(pd.read_csv(file_name))
+    return load_xlsx_cached(file_name)
+
+
+def _init_worker() -> None:
+    """Отключает информационные сообщения журнала в процессах-исполнителях"""
+    logging.disable(logging.INFO)
+
+
+def process_statement(
+    file_name: str,
+    date: Optional[str],
+    reports: Iterable[str] = REPORTS,
+    market_data: Optional[dict] = None,
+    cashback_rules: Optional[CashbackRules] = None,
+) -> dict:
+    """Функция строит отчеты по одной выписке. Результаты отчетов возвращаются компактными JSON-строками,
+    ошибка чтения или расчета не прерывает пакет, а записывается в поле error"""
+    started = perf_counter()
+    results: dict[str, Optional[str]] = {}
+    result = {"file": file_name, "pid": os.getpid(), "rows": 0, "results": results, "error": None}
+    try:
+        df = load_statement(file_name)
+        result["rows"] = len(df)
+        for report in reports:
+            if report == "home":
+                home_page = build_home_page(df, date, market_data or {}, cashback_rules)
+                results[report] = json.dumps(home_page, ensure_ascii=False, separators=(",", ":"))
+            elif report == "weekday":
+                results[report] = compute_spending_by_weekday(df, date)
+            elif report == "transfers":
+                results[report] = search_transfers_to_individuals(df, date)
+            else:
+                raise ValueError(f"Неизвестный отчет {report}")
+    except Exception as e:
+        result["error"] = f"Произошла ошибка {e}"
+    result["seconds"] = perf_counter() - started
+    return result
+
+
+def summarize_throughput(results: Iterable[dict]) -> dict[int, dict]:
+    """Функция считает по каждому процессу-исполнителю количество файлов, строк, время работы и строк в секунду"""
+    summary: dict[int, dict] = {}
+    for result in results:
+        worker = summary.setdefault(result["pid"], {"files": 0, "errors": 0, "rows": 0, "seconds": 0.0})
+        worker["files"] += 1
+        worker["errors"] += result["error"] is not None
+        worker["rows"] += result["rows"]
+        worker["seconds"] += result["seconds"]
+    for worker in summary.values():
+        worker["rows_per_second"] = round(worker["rows"] / worker["seconds"], 1) if worker["seconds"] else 0.0
+    return summary
+
+
+def run_batch(
+    files: list[str],
+    date: Optional[str] = None,
+    reports: Iterable[str] = REPORTS,
+    max_workers: Optional[int] = None,
+    market_data: Optional[dict] = None,
+    on_progress: Optional[Callable[[int, int, dict], None]] = None,
+    cashback_rules: Optional[CashbackRules] = None,
+) -> list[dict]:
+    """Функция распределяет построение отчетов по файлам выписок между процессами.
+    Курсы валют и акций для страницы «Главная» запрашиваются один раз и вместе с правилами кешбэка
+    передаются всем процессам.
+    Результаты возвращаются в порядке files, on_progress вызывается после каждого обработанного файла"""
+    reports = tuple(reports)
+    if "home" in reports and market_data is None:
+        logger.info("Получение курсов валют и стоимости акций для всего пакета")
+        try:
+            market_data = fetch_market_data(
+                {"currency_rates": get_currency_rates, "stock_prices": get_stocks}, load_user_settings()
+            )
+        except Exception as e:
+            logger.error("Произошла ошибка %s", e)
+            market_data = {}
+
+    logger.info("Обработка %s файлов", len(files))
+    results: list[Optional[dict]] = [None] * len(files)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(process_statement, file_name, date, reports, market_data, cashback_rules): index
+            for index, file_name in enumerate(files)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_progress is not None:
+                on_progress(done, len(files), future.result())
+    return [result for result in results if result is not None]
+
+
+def main() -> None:
+    """Пакетная обработка выписок: python -m src.batch data/statements --date "2021-12-31 23:59:59" -o out.ndjson"""
+    parser = argparse.ArgumentParser(description="Параллельное построение отчетов по файлам выписок")
+    parser.add_argument("source", help="каталог с xlsx/csv-файлами или файл-манифест со списком путей")
+    parser.add_argument("--date", help="дата отчетов в формате YYYY-MM-DD HH:MM:SS (по умолчанию - текущая)")
+    parser.add_argument("--reports", nargs="+", choices=REPORTS, default=list(REPORTS), help="какие отчеты строить")
+    parser.add_argument("--workers", type=int, help="количество процессов (по умолчанию - число ядер)")
+    parser.add_argument("-o", "--output", help="файл NDJSON для результатов (по одной строке на выписку)")
+    args = parser.parse_args()
+
+    def print_progress(done: int, total: int, result: dict) -> None:
+        status = "ошибка" if result["error"] else "готово"
+        print(f"[{done}/{total}] {result['file']}: {status} за {result['seconds']:.2f} с", file=sys.stderr)
+
+    started = perf_counter()
+    results = run_batch(
+        collect_statement_files(args.source),
+        args.date,
+        args.reports,
+        args.workers,
+        None,
+        print_progress,
+        load_cashback_rules(),
+    )
+    elapsed = perf_counter() - started
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    print(f"{'процесс':>10} {'файлов':>8} {'ошибок':>8} {'строк':>10} {'секунд':>10} {'строк/с':>12}")
+    for pid, worker in sorted(summarize_throughput(results).items()):
+        print(
+            f"{pid:>10} {worker['files']:>8} {worker['errors']:>8} {worker['rows']:>10} "
+            f"{worker['seconds']:>10.2f} {worker['rows_per_second']:>12,.1f}"
+        )
+    print(f"Всего: {len(results)} файлов за {elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import tempfile
+from os.path import basename, dirname, exists, join
+from typing import Callable
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from src.logger import logger_setup
+from src.schema import apply_transaction_schema
+
+logger = logger_setup()
+
+CACHE_DIR_NAME = ".cache"
+
+
+def get_cache_paths(file_name: str) -> tuple[str, str]:
+    """Функция возвращает пути к feather-файлу кэша и к файлу с метаданными исходного xlsx-файла"""
+    cache_dir = join(dirname(file_name), CACHE_DIR_NAME)
+    name = basename(file_name)
+    return join(cache_dir, f"{name}.feather"), join(cache_dir, f"{name}.meta.json")
+
+
+def file_sha256(file_name: str) -> str:
+    """Функция считает хэш SHA-256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_atomic(path: str, write: Callable[[str], None]) -> None:
+    """Функция записывает файл через временный файл и переименование, чтобы не оставить частично записанный кэш.
+    Временный файл создается с уникальным именем в каталоге path, поэтому одновременная запись одного файла
+    несколькими процессами не смешивает данные: остается результат последнего переименования"""
+    fd, tmp_path = tempfile.mkstemp(prefix=f"{basename(path)}.", suffix=".tmp", dir=dirname(path) or ".")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_meta(meta_path: str, meta: dict) -> None:
+    """Функция атомарно записывает метаданные кэша"""
+
+    def write(path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    write_atomic(meta_path, write)
+
+
+def _read_meta(meta_path: str) -> dict:
+    """Функция читает метаданные кэша, при отсутствии или повреждении файла возвращает пустой словарь"""
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def is_cache_valid(file_name: str, meta_path: str) -> bool:
+    """Функция проверяет, соответствует ли кэш текущему состоянию xlsx-файла.
+    Если размер и время изменения совпадают, хэш не пересчитывается."""
+    meta = _read_meta(meta_path)
+    stat = os.stat(file_name)
+    if not meta or meta.get("size") != stat.st_size:
+        return False
+    if meta.get("mtime_ns") == stat.st_mtime_ns:
+        return True
+    if meta.get("sha256") != file_sha256(file_name):
+        return False
+    logger.info("Файл изменен без изменения содержимого, обновляем метаданные кэша")
+    _write_meta(meta_path, {**meta, "mtime_ns": stat.st_mtime_ns})
+    return True
+
+
+def load_xlsx_cached(file_name: str) -> pd.DataFrame:
+    """Функция считывает xlsx-файл через колоночный кэш (Feather/Arrow IPC).
+    При первом чтении или изменении файла кэш пересобирается, иначе читается через memory map."""
+    cache_path, meta_path = get_cache_paths(file_name)
+
+    if exists(cache_path) and is_cache_valid(file_name, meta_path):
+        logger.info("Чтение данных из кэша")
+        table = feather.read_table(cache_path, memory_map=True)
+        return table.to_pandas(types_mapper={pa.large_string(): pd.StringDtype("pyarrow")}.get)
+
+    logger.info("Кэш отсутствует или устарел, считывание информации из xlsx-файла")
+    stat = os.stat(file_name)
+    meta = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(file_name)}
+    df = apply_transaction_schema(pd.read_excel(file_name))
+
+    logger.info("Запись кэша")
+    os.makedirs(dirname(cache_path), exist_ok=True)
+    write_atomic(cache_path, lambda path: feather.write_feather(df, path, compression="uncompressed"))
+    _write_meta(meta_path, meta)
+    return df
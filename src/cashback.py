@@ -0,0 +1,177 @@
+import json
+from os.path import dirname, exists, join
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.logger import logger_setup
+from src.money import divide_rounded, to_kopecks
+
+logger = logger_setup()
+
+# ставка кешбэка задается в процентах, внутри считается в сотых долях процента (базисных пунктах)
+BASIS_POINTS = 10_000
+RULE_KEYS = {"name", "cards", "categories", "mcc", "rate", "monthly_cap"}
+CONFIG_KEYS = {"base_rate", "monthly_cap", "excluded_categories", "excluded_mcc", "rules"}
+# ключ пользовательских настроек: словарь с правилами или путь к отдельному JSON-файлу с ними
+SETTINGS_KEY = "cashback"
+
+
+def _codes(column: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Функция возвращает коды значений столбца (-1 для пропусков) и сами значения.
+    Для категориальных столбцов берутся готовые коды, остальные факторизуются один раз"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy(), column.cat.categories
+    codes, uniques = pd.factorize(column, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def _rubles_to_kopecks(value: Optional[float]) -> Optional[int]:
+    """Функция переводит лимит в рублях из настроек в копейки"""
+    return None if value is None else int(to_kopecks(np.array([value]))[0])
+
+
+class CashbackRules:
+    """Правила кешбэка: базовая ставка, исключенные категории и MCC, правила с повышенной ставкой
+    для категорий, MCC и карт и месячные лимиты. Правила задаются словарем вида
+    {"base_rate": 1, "monthly_cap": 5000, "excluded_categories": [...], "excluded_mcc": [...],
+    "rules": [{"name": "...", "cards": ["*7197"], "categories": [...], "mcc": [...], "rate": 5, "monthly_cap": 1000}]}.
+    Операция получает ставку первого подошедшего правила (условия правила объединяются по «и»), иначе базовую.
+    Ставки - в процентах, лимиты - в рублях за календарный месяц по карте"""
+
+    def __init__(self, config: Optional[dict] = None) -> None:
+        config = dict(config or {})
+        unknown = set(config) - CONFIG_KEYS
+        if unknown:
+            raise ValueError(f"Неизвестные параметры кешбэка: {', '.join(sorted(unknown))}")
+        self.base_rate = round(float(config.get("base_rate", 1)) * 100)
+        self.monthly_cap = _rubles_to_kopecks(config.get("monthly_cap"))
+        self.excluded_categories = sorted(config.get("excluded_categories", []))
+        self.excluded_mcc = sorted(int(mcc) for mcc in config.get("excluded_mcc", []))
+        self.rules = []
+        for number, rule in enumerate(config.get("rules", []), start=1):
+            unknown = set(rule) - RULE_KEYS
+            if unknown:
+                raise ValueError(f"Неизвестные параметры правила кешбэка {number}: {', '.join(sorted(unknown))}")
+            if "rate" not in rule:
+                raise ValueError(f"Не указана ставка правила кешбэка {number}")
+            self.rules.append(
+                {
+                    "name": rule.get("name", f"Правило {number}"),
+                    "cards": sorted(card if card.startswith("*") else f"*{card}" for card in rule.get("cards", [])),
+                    "categories": sorted(rule.get("categories", [])),
+                    "mcc": sorted(int(mcc) for mcc in rule.get("mcc", [])),
+                    "rate": round(float(rule["rate"]) * 100),
+                    "monthly_cap": _rubles_to_kopecks(rule.get("monthly_cap")),
+                }
+            )
+        # последние два «правила» - базовая ставка и исключенные операции
+        self.rates = np.array([rule["rate"] for rule in self.rules] + [self.base_rate, 0], dtype=np.int64)
+        no_cap = np.iinfo(np.int64).max
+        caps = [rule["monthly_cap"] for rule in self.rules] + [None, None]
+        self.caps = np.array([no_cap if cap is None else cap for cap in caps], dtype=np.int64)
+        self.by_month = self.monthly_cap is not None or any(cap is not None for cap in caps)
+
+    def __repr__(self) -> str:
+        """Представление правил используется в ключе кэша результатов, поэтому зависит только от настроек"""
+        return (
+            f"CashbackRules(base_rate={self.base_rate}, monthly_cap={self.monthly_cap}, "
+            f"excluded_categories={self.excluded_categories}, excluded_mcc={self.excluded_mcc}, rules={self.rules})"
+        )
+
+    def assign_rules(self, df: pd.DataFrame, positions: np.ndarray) -> np.ndarray:
+        """Функция возвращает номер правила для строк positions: len(rules) - базовая ставка,
+        len(rules) + 1 - исключенная операция. Каждое условие - таблица «значение -> подходит»
+        по кодам столбца, поэтому правило проверяется одной векторной выборкой по всем строкам"""
+        codes: dict[str, tuple[np.ndarray, pd.Index]] = {}
+
+        def matches(column_name: str, values: list) -> np.ndarray:
+            if column_name not in df.columns:
+                return np.zeros(len(positions), dtype=bool)
+            if column_name not in codes:
+                codes[column_name] = _codes(df[column_name])
+            column_codes, uniques = codes[column_name]
+            # последний элемент таблицы соответствует коду -1 (пропуск) и всегда False
+            table = np.append(uniques.isin(values), False)
+            return table[column_codes[positions]]
+
+        rule_index = np.full(len(positions), len(self.rules), dtype=np.int64)
+        # правила применяются с конца, чтобы у операции осталось первое подошедшее правило
+        for index in range(len(self.rules) - 1, -1, -1):
+            rule = self.rules[index]
+            mask = np.ones(len(positions), dtype=bool)
+            for column_name, key in (("Номер карты", "cards"), ("Категория", "categories"), ("MCC", "mcc")):
+                if rule[key]:
+                    mask &= matches(column_name, rule[key])
+            rule_index[mask] = index
+        excluded = matches("Категория", self.excluded_categories) | matches("MCC", self.excluded_mcc)
+        rule_index[excluded] = len(self.rules) + 1
+        return rule_index
+
+    def calculate(self, df: pd.DataFrame, positions: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Функция считает расходы и кешбэк по картам (в копейках) за один проход по строкам positions
+        (по умолчанию - по всем). Суммы расходов собираются по группам «карта, правило, месяц» через bincount,
+        кешбэк считается по сумме группы, ограничивается лимитами правила и месячным лимитом карты"""
+        positions = np.arange(len(df)) if positions is None else np.asarray(positions)
+        amounts = df["Сумма платежа"].to_numpy(dtype="float64", na_value=np.nan)[positions]
+        card_codes, card_names = _codes(df["Номер карты"])
+        card_codes = card_codes[positions].astype(np.int64)
+        spending = (amounts < 0) & (card_codes >= 0)
+        positions, card_codes = positions[spending], card_codes[spending]
+        spent = -to_kopecks(amounts[spending])
+        rule_index = self.assign_rules(df, positions)
+
+        months = np.zeros(len(positions), dtype=np.int64)
+        if self.by_month and len(positions):
+            dates = df["Дата операции"]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+            periods = dates.to_numpy()[positions].astype("datetime64[M]")
+            # операции без даты относятся к первому месяцу периода
+            known = ~np.isnat(periods)
+            months = periods.astype(np.int64)
+            months = np.where(known, months - (months[known].min() if known.any() else 0), 0)
+        month_count = int(months.max()) + 1 if len(months) else 1
+
+        # суммы расходов по группам «карта, правило, месяц» - плотный массив, индекс группы кодируется одним числом
+        shape = (len(card_names), len(self.rates), month_count)
+        groups = (card_codes * len(self.rates) + rule_index) * month_count + months
+        group_spent = np.bincount(groups, weights=spent, minlength=int(np.prod(shape)))
+        group_spent = np.rint(group_spent).astype(np.int64).reshape(shape)
+        cashback = divide_rounded(group_spent * self.rates[:, np.newaxis], BASIS_POINTS)
+        cashback = np.minimum(cashback, self.caps[:, np.newaxis]).sum(axis=1)
+        if self.monthly_cap is not None:
+            cashback = np.minimum(cashback, self.monthly_cap)
+
+        used = np.flatnonzero(np.bincount(card_codes, minlength=len(card_names)))
+        total_spent, total_cashback = group_spent.sum(axis=(1, 2)), cashback.sum(axis=1)
+        logger.info("Кешбэк рассчитан по %s операциям и %s картам", len(positions), len(used))
+        return pd.DataFrame(
+            {
+                "Номер карты": card_names[used],
+                "spent": total_spent[used],
+                "cashback": total_cashback[used],
+            }
+        )
+
+
+def load_cashback_rules(
+    settings: Optional[dict] = None, file_name: str = "user_settings.json"
+) -> Optional[CashbackRules]:
+    """Функция возвращает правила кешбэка из пользовательских настроек: ключ "cashback" содержит правила
+    или путь к отдельному JSON-файлу с ними (относительно файла настроек).
+    Если правила не заданы, возвращает None - тогда кешбэк считается по базовой ставке 1 рубль на 100 рублей"""
+    if settings is None:
+        if not exists(file_name):
+            return None
+        with open(file_name, encoding="utf-8") as json_file:
+            settings = json.load(json_file)
+    config = settings.get(SETTINGS_KEY)
+    if config is None:
+        return None
+    if isinstance(config, str):
+        logger.info("Чтение правил кешбэка из файла %s", config)
+        with open(join(dirname(file_name), config), encoding="utf-8") as json_file:
+            config = json.load(json_file)
+    return CashbackRules(config)
@@ -0,0 +1,8 @@
+import os
+from os.path import abspath, dirname, join
+
+PROJECT_DIR = dirname(dirname(abspath(__file__)))
+
+# Файл с операциями по умолчанию (одинаковый для main.py и views): data/operations.xlsx в корне проекта,
+# переопределяется переменной окружения OPERATIONS_FILE
+OPERATIONS_FILE = os.getenv("OPERATIONS_FILE", join(PROJECT_DIR, "data", "operations.xlsx"))
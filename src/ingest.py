@@ -0,0 +1,129 @@
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from os.path import dirname, isdir, join, splitext
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from src.logger import logger_setup
+from src.schema import apply_transaction_schema
+from src.storage import COLUMNS, row_keys
+from src.utils import format_dates
+
+logger = logger_setup()
+
+STATEMENT_EXTENSIONS = (".xlsx", ".csv")
+# Названия столбцов в выгрузках других банков и старых выгрузках -> столбцы выгрузки проекта
+COLUMN_ALIASES = {
+    "Дата": "Дата операции",
+    "Дата и время операции": "Дата операции",
+    "Карта": "Номер карты",
+    "Сумма": "Сумма платежа",
+    "Сумма в валюте счета": "Сумма платежа",
+    "Валюта": "Валюта платежа",
+    "Кешбэк": "Кэшбэк",
+    "MCC-код": "MCC",
+}
+
+
+def collect_statement_files(source: str) -> list[str]:
+    """Функция возвращает список файлов выписок: все xlsx/csv-файлы каталога
+    или пути из файла-манифеста (по одному в строке или JSON-список, относительные пути - от каталога манифеста)"""
+    if isdir(source):
+        return sorted(
+            join(source, name) for name in os.listdir(source) if splitext(name)[1].lower() in STATEMENT_EXTENSIONS
+        )
+    with open(source, encoding="utf-8") as f:
+        content = f.read()
+    paths = json.loads(content) if splitext(source)[1].lower() == ".json" else content.splitlines()
+    return [join(dirname(source), path.strip()) for path in paths if path.strip()]
+
+
+def normalize_statement(df: pd.DataFrame, aliases: Optional[dict[str, str]] = None) -> pd.DataFrame:
+    """Функция приводит выписку к столбцам и типам проекта: переименовывает столбцы по словарю синонимов,
+    добавляет отсутствующие столбцы пустыми, отбрасывает лишние и приводит типы к схеме транзакций"""
+    aliases = COLUMN_ALIASES if aliases is None else aliases
+    renamed = df.rename(columns={name: aliases[name] for name in df.columns if name in aliases})
+    renamed = renamed.loc[:, ~renamed.columns.duplicated()]
+    return apply_transaction_schema(renamed.reindex(columns=list(COLUMNS)))
+
+
+def read_statement(file_name: str, aliases: Optional[dict[str, str]] = None) -> list[pd.DataFrame]:
+    """Функция читает все листы xlsx-файла (или csv-файл) и возвращает листы с операциями,
+    приведенные к схеме проекта. Листы без столбца даты операции (например, сводные) пропускаются"""
+    if splitext(file_name)[1].lower() == ".csv":
+        sheets = {"csv": pd.read_csv(file_name)}
+    else:
+        sheets = pd.read_excel(file_name, sheet_name=None)
+    aliases = COLUMN_ALIASES if aliases is None else aliases
+    frames = []
+    for sheet_name, sheet in sheets.items():
+        if "Дата операции" not in {aliases.get(name, name) for name in sheet.columns}:
+            logger.info("Лист %s файла %s пропущен: нет даты операции", sheet_name, file_name)
+            continue
+        frames.append(normalize_statement(sheet, aliases))
+    return frames
+
+
+def _init_worker() -> None:
+    """Отключает информационные сообщения журнала в процессах-исполнителях"""
+    logging.disable(logging.INFO)
+
+
+def merge_statements(
+    files: Iterable[str], max_workers: Optional[int] = None, aliases: Optional[dict[str, str]] = None
+) -> pd.DataFrame:
+    """Функция объединяет выписки из нескольких xlsx/csv-файлов и листов в один DataFrame схемы проекта.
+    Файлы читаются параллельно (max_workers процессов, 1 - последовательно).
+    Пересекающиеся выписки дедуплицируются по ключу строки: хэш ее значений и номер повторения такой же строки
+    внутри листа. Поэтому одинаковые операции из разных выписок остаются один раз, а действительно повторяющиеся
+    операции внутри одной выписки сохраняются. Результат отсортирован по дате операции (новые сверху)"""
+    files = list(files)
+    if max_workers == 1 or len(files) < 2:
+        sheets = [read_statement(file_name, aliases) for file_name in files]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            sheets = list(executor.map(read_statement, files, [aliases] * len(files)))
+
+    frames = [frame for file_sheets in sheets for frame in file_sheets]
+    if not frames:
+        return apply_transaction_schema(pd.DataFrame(columns=list(COLUMNS)))
+    keys = pd.concat([row_keys(frame) for frame in frames], ignore_index=True)
+    merged = pd.concat(frames, ignore_index=True)
+    unique = ~keys.duplicated().to_numpy()
+    logger.info("Объединено строк: %s, дубликатов удалено: %s", len(merged), int((~unique).sum()))
+    merged = merged[unique].sort_values("Дата операции", ascending=False, kind="stable", na_position="last")
+    return apply_transaction_schema(merged.reset_index(drop=True))
+
+
+def write_statement(df: pd.DataFrame, file_name: str) -> None:
+    """Функция записывает объединенную выписку в xlsx или csv (даты - в формате выгрузки банка)"""
+    df = format_dates(df)
+    if splitext(file_name)[1].lower() == ".csv":
+        df.to_csv(file_name, index=False)
+    else:
+        df.to_excel(file_name, index=False)
+
+
+def main() -> None:
+    """Объединение выписок: python -m src.ingest data/statements -o data/operations.xlsx"""
+    parser = argparse.ArgumentParser(description="Объединение выписок с удалением пересекающихся операций")
+    parser.add_argument("sources", nargs="+", help="xlsx/csv-файлы, каталоги или файлы-манифесты")
+    parser.add_argument("-o", "--output", required=True, help="итоговый xlsx или csv-файл")
+    parser.add_argument("--workers", type=int, help="количество процессов чтения")
+    args = parser.parse_args()
+
+    files: list[str] = []
+    for source in args.sources:
+        extension = splitext(source)[1].lower()
+        files += [source] if extension in STATEMENT_EXTENSIONS else collect_statement_files(source)
+    merged = merge_statements(files, args.workers)
+    write_statement(merged, args.output)
+    print(f"Записано операций: {len(merged)} из {len(files)} файлов в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from functools import wraps
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+MAX_RECORDS = 10_000
+
+
+class _Stage:
+    """Замер одного этапа: время, количество обработанных строк и пик памяти (если включен учет памяти) -
+    на сколько байт выделенная память превышала уровень на начало этапа"""
+
+    def __init__(self, tracer: "Tracer", name: str, rows: Optional[int]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+        self.peak_bytes: Optional[int] = None
+        self._base = self._peak = 0
+
+    def __enter__(self) -> "_Stage":
+        stack = self.tracer._stack()
+        if self.tracer.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, peak)
+            tracemalloc.reset_peak()
+            self._base = self._peak = current
+        stack.append(self)
+        self.started = time.time()
+        self._counter = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        seconds = time.perf_counter() - self._counter
+        stack = self.tracer._stack()
+        stack.pop()
+        if self.tracer.memory and tracemalloc.is_tracing():
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            self.peak_bytes = self._peak - self._base
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, self._peak)
+        self.tracer.records.append(
+            {
+                "name": self.name,
+                "start": self.started,
+                "seconds": seconds,
+                "rows": self.rows,
+                "peak_bytes": self.peak_bytes,
+                "thread": threading.get_ident(),
+                "depth": len(stack),
+            }
+        )
+
+
+class _NoStage:
+    """Пустой замер, который возвращается при выключенной инструментации"""
+
+    rows = None
+
+    def __enter__(self) -> "_NoStage":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+class Tracer:
+    """Необязательная инструментация: время работы, количество строк и пик памяти по этапам.
+    Пока инструментация выключена, stage возвращает пустой контекстный менеджер,
+    а функции с декоратором traced сразу вызывают исходную функцию"""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.memory = False
+        self.records: deque[dict] = deque(maxlen=MAX_RECORDS)
+        self._local = threading.local()
+
+    def enable(self, memory: bool = False) -> None:
+        """Включает замеры, при memory=True - и учет пика памяти через tracemalloc (заметно замедляет работу)"""
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Выключает замеры (накопленные записи сохраняются)"""
+        self.enabled = False
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.memory = False
+
+    def clear(self) -> None:
+        """Удаляет накопленные записи"""
+        self.records.clear()
+
+    def _stack(self) -> list:
+        """Стек вложенных этапов текущего потока"""
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def stage(self, name: str, rows: Optional[int] = None) -> _Stage | _NoStage:
+        """Контекстный менеджер для замера участка кода: with tracer.stage("serialization"): ..."""
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name, rows)
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Декоратор для замера функции. Количество строк - длина первого аргумента-DataFrame"""
+
+        def wrapper(func: Callable) -> Callable:
+            stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+            @wraps(func)
+            def inner(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                rows = next((len(arg) for arg in args if isinstance(arg, pd.DataFrame)), None)
+                with _Stage(self, stage_name, rows):
+                    return func(*args, **kwargs)
+
+            return inner
+
+        return wrapper
+
+    def summary(self) -> dict[str, dict]:
+        """Сводка по этапам: количество вызовов, суммарное время, строки и максимальный пик памяти"""
+        summary: dict[str, dict] = {}
+        for record in list(self.records):
+            item = summary.setdefault(record["name"], {"calls": 0, "seconds": 0.0, "rows": 0, "peak_bytes": 0})
+            item["calls"] += 1
+            item["seconds"] += record["seconds"]
+            item["rows"] += record["rows"] or 0
+            item["peak_bytes"] = max(item["peak_bytes"], record["peak_bytes"] or 0)
+        return summary
+
+    def to_json_trace(self) -> str:
+        """Экспорт записей в формате Trace Event (открывается в chrome://tracing и Perfetto)"""
+        events = [
+            {
+                "name": record["name"],
+                "ph": "X",
+                "ts": round(record["start"] * 1e6),
+                "dur": round(record["seconds"] * 1e6),
+                "pid": os.getpid(),
+                "tid": record["thread"],
+                "args": {"rows": record["rows"], "peak_bytes": record["peak_bytes"]},
+            }
+            for record in list(self.records)
+        ]
+        return json.dumps({"traceEvents": events}, ensure_ascii=False)
+
+    def to_prometheus(self, prefix: str = "bank") -> str:
+        """Экспорт сводки в текстовом формате Prometheus"""
+        metrics = [
+            ("stage_calls_total", "counter", "Количество вызовов этапа", "calls"),
+            ("stage_seconds_total", "counter", "Суммарное время этапа в секундах", "seconds"),
+            ("stage_rows_total", "counter", "Количество обработанных строк", "rows"),
+            ("stage_peak_bytes", "gauge", "Максимальный пик памяти этапа в байтах", "peak_bytes"),
+        ]
+        summary = self.summary()
+        lines = []
+        for metric, metric_type, description, key in metrics:
+            lines.append(f"# HELP {prefix}_{metric} {description}")
+            lines.append(f"# TYPE {prefix}_{metric} {metric_type}")
+            for name, item in sorted(summary.items()):
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {item[key]}')
+        return "\n".join(lines) + "\n"
+
+
+tracer = Tracer()
+if os.getenv("INSTRUMENTATION") == "1":
+    tracer.enable(memory=os.getenv("INSTRUMENTATION_MEMORY") == "1")
+
+stage = tracer.stage
+traced = tracer.traced
@@ -1,11 +1,58 @@
+import atexit
 import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_FORMAT = "%(asctime)s:%(filename)s:%(funcName)s %(levelname)s: %(message)s"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+LOG_FILE = os.getenv("LOG_FILE")
+
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_handlers: list[logging.Handler] = []
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+class _LazyQueueHandler(QueueHandler):
+    """Передает записи в очередь без форматирования: сообщение собирается из %-аргументов
+    уже в потоке QueueListener, поэтому вызов логгера не ждет ни форматирования, ни вывода в консоль или файл"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _start_listener() -> None:
+    """Запускает поток, который выводит записи из очереди в консоль и (если задан LOG_FILE) в файл"""
+    global _listener
+    _listener = QueueListener(_queue, *_handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    """Останавливает поток вывода, предварительно записав все записи из очереди"""
+    if _listener is not None:
+        _listener.stop()
 
 
 def logger_setup() -> logging.Logger:
+    """Функция возвращает логгер приложения. Обработчики настраиваются один раз при первом вызове:
+    логгер только кладет записи в очередь, вывод выполняет отдельный поток.
+    Уровень задается переменной окружения LOG_LEVEL (по умолчанию DEBUG), файл журнала - LOG_FILE"""
     my_logger = logging.getLogger(__name__)
-    console_handler = logging.StreamHandler()
-    file_formatter = logging.Formatter("%(asctime)s:%(filename)s:%(funcName)s %(levelname)s: %(message)s")
-    console_handler.setFormatter(file_formatter)
-    my_logger.addHandler(console_handler)
-    my_logger.setLevel(logging.DEBUG)
+    with _lock:
+        if not _handlers:
+            formatter = logging.Formatter(LOG_FORMAT)
+            _handlers.append(logging.StreamHandler())
+            if LOG_FILE:
+                _handlers.append(logging.FileHandler(LOG_FILE, encoding="utf-8"))
+            for handler in _handlers:
+                handler.setFormatter(formatter)
+            my_logger.addHandler(_LazyQueueHandler(_queue))
+            my_logger.setLevel(LOG_LEVEL)
+            _start_listener()
+            atexit.register(_stop_listener)
+            os.register_at_fork(after_in_child=_start_listener)
     return my_logger
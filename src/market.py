@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.cache import write_atomic
+from src.logger import logger_setup
+
+logger = logger_setup()
+
+MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL", 300))
+MARKET_REQUEST_TIMEOUT = float(os.getenv("MARKET_REQUEST_TIMEOUT", 10))
+
+
+class TTLCache:
+    """Кэш значений с ограниченным временем жизни: в памяти и (необязательно) в JSON-файле на диске"""
+
+    def __init__(self, ttl: float, file_name: Optional[str] = None) -> None:
+        self.ttl = ttl
+        self.file_name = file_name
+        self._items: dict[str, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        if file_name and os.path.exists(file_name):
+            try:
+                with open(file_name, encoding="utf-8") as f:
+                    self._items = {key: (expires, value) for key, (expires, value) in json.load(f).items()}
+            except (OSError, ValueError):
+                logger.error("Не удалось прочитать файл кэша курсов")
+
+    def get(self, key: str) -> Any:
+        """Возвращает значение по ключу или None, если значения нет или срок его жизни истек"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or item[0] < time.time():
+                return None
+            return item[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Сохраняет значение по ключу на время ttl"""
+        with self._lock:
+            self._items[key] = (time.time() + self.ttl, value)
+            if self.file_name:
+                self._dump()
+
+    def clear(self) -> None:
+        """Очищает кэш"""
+        with self._lock:
+            self._items.clear()
+            if self.file_name:
+                self._dump()
+
+    def _dump(self) -> None:
+        """Атомарно записывает непросроченные значения в файл"""
+        now = time.time()
+        items = {key: item for key, item in self._items.items() if item[0] >= now}
+
+        def write(path: str) -> None:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False)
+
+        write_atomic(str(self.file_name), write)
+
+
+market_cache = TTLCache(MARKET_CACHE_TTL, os.getenv("MARKET_CACHE_FILE"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Функция возвращает общую HTTP-сессию с пулом соединений"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def fetch_market_data(
+    fetchers: dict[str, Callable[..., Any]],
+    settings: dict,
+    timeout: float = MARKET_REQUEST_TIMEOUT,
+    cache: Optional[TTLCache] = market_cache,
+) -> dict[str, Any]:
+    """Функция параллельно выполняет запросы к внешним API (курсы валют, стоимость акций).
+    Каждой функции-загрузчику передаются настройки пользователя, общая HTTP-сессия и таймаут.
+    Результаты хранятся в кэше, поэтому повторные запросы в течение ttl не обращаются к сети"""
+    settings_key = str(sorted(settings.items()))
+    results = {}
+    missing = []
+    for name in fetchers:
+        cached = cache.get(f"{name}:{settings_key}") if cache is not None else None
+        if cached is not None:
+            logger.info("%s: данные из кэша", name)
+            results[name] = cached
+        else:
+            missing.append(name)
+
+    if missing:
+        logger.info("Параллельный запрос данных: %s", missing)
+        session = get_session()
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            futures = {
+                name: executor.submit(fetchers[name], settings=settings, session=session, timeout=timeout)
+                for name in missing
+            }
+            for name, future in futures.items():
+                results[name] = future.result()
+                if cache is not None:
+                    cache.set(f"{name}:{settings_key}", results[name])
+
+    return {name: results[name] for name in fetchers}
@@ -0,0 +1,53 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike
+
+KOPECKS_IN_RUBLE = 100
+# кешбэк: 1 рубль на каждые 100 рублей расходов
+CASHBACK_RATE = 100
+
+
+def to_kopecks(amounts: pd.Series | np.ndarray) -> np.ndarray:
+    """Функция переводит суммы в рублях в целые копейки (int64) одной векторной операцией.
+    Пропуски считаются нулем, как при суммировании в pandas"""
+    values = pd.to_numeric(pd.Series(amounts, copy=False), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    kopecks: np.ndarray = np.nan_to_num(np.rint(values * KOPECKS_IN_RUBLE)).astype(np.int64)
+    return kopecks
+
+
+def to_rubles(kopecks: ArrayLike) -> np.ndarray:
+    """Функция переводит копейки в рубли для вывода (ближайшее к сумме с двумя знаками число float)"""
+    return np.asarray(kopecks) / KOPECKS_IN_RUBLE
+
+
+def divide_rounded(numerator: ArrayLike, denominator: ArrayLike) -> np.ndarray:
+    """Функция делит целые числа с округлением до ближайшего целого (половина - от нуля) без перехода к float"""
+    numerators, denominators = np.asarray(numerator, dtype=np.int64), np.asarray(denominator, dtype=np.int64)
+    quotient: np.ndarray = np.sign(numerators) * ((2 * np.abs(numerators) + denominators) // (2 * denominators))
+    return quotient
+
+
+def cashback_kopecks(spent: ArrayLike) -> np.ndarray:
+    """Функция считает кешбэк в копейках по сумме расходов в копейках (1 рубль на каждые 100 рублей)"""
+    return divide_rounded(spent, CASHBACK_RATE)
+
+
+def mean_rubles(sums: ArrayLike, counts: ArrayLike) -> np.ndarray:
+    """Функция возвращает средние по модулю суммы в рублях по суммам в копейках и количествам операций.
+    Среднее округляется до копейки целочисленным делением"""
+    return to_rubles(divide_rounded(np.abs(np.asarray(sums, dtype=np.int64)), counts))
+
+
+def card_records(cards: pd.Index | list, spent: ArrayLike, cashback: Optional[ArrayLike] = None) -> list[dict]:
+    """Функция формирует информацию по картам (последние 4 цифры, расходы, кешбэк) из сумм расходов в копейках.
+    Кешбэк в копейках (например, по правилам кешбэка) можно передать, иначе он считается по базовой ставке.
+    В рубли суммы переводятся только здесь, при формировании результата"""
+    spent_kopecks = np.abs(np.asarray(spent, dtype=np.int64))
+    total_spent = to_rubles(spent_kopecks).tolist()
+    bonuses = to_rubles(cashback_kopecks(spent_kopecks) if cashback is None else np.asarray(cashback, dtype=np.int64))
+    return [
+        {"last_digits": str(card)[1:], "total_spent": total, "cashback": bonus}
+        for card, total, bonus in zip(cards, total_spent, bonuses.tolist())
+    ]
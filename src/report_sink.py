@@ -0,0 +1,111 @@
+import atexit
+import json
+import os
+import queue
+import threading
+from typing import Any, Optional
+
+from src.cache import write_atomic
+from src.logger import logger_setup
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+logger = logger_setup()
+
+REPORTS_SERIALIZER = os.getenv("REPORTS_SERIALIZER", "json")
+SINK_MODES = ("json", "ndjson")
+
+
+class ReportSink:
+    """Фоновая запись отчетов в файлы. Вызов submit только ставит результат в очередь,
+    запись выполняет отдельный поток: в режиме json файл атомарно перезаписывается последним результатом
+    (через временный файл и переименование), в режиме ndjson результаты дописываются в файл по одному в строке.
+    Накопившиеся в очереди результаты записываются пачкой"""
+
+    def __init__(self, serializer: str = REPORTS_SERIALIZER) -> None:
+        if serializer == "orjson" and orjson is None:
+            logger.warning("orjson не установлен, используется json")
+            serializer = "json"
+        self.serializer = serializer
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, file_name: str, result: Any, mode: str = "json") -> None:
+        """Ставит результат отчета в очередь на запись (результат сериализуется в фоновом потоке)"""
+        if self._thread is None:
+            self._start()
+        self._queue.put((file_name, mode, result))
+
+    def flush(self) -> None:
+        """Ожидает, пока все поставленные в очередь результаты будут записаны"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def dumps(self, result: Any, mode: str = "json") -> bytes:
+        """Сериализует результат: с отступами для json, в одну строку для ndjson"""
+        if self.serializer == "orjson":
+            return orjson.dumps(result, option=orjson.OPT_INDENT_2 if mode == "json" else 0)
+        return json.dumps(result, indent=4 if mode == "json" else None, ensure_ascii=False).encode("utf-8")
+
+    def _start(self) -> None:
+        """Запускает поток записи при первом обращении"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="report-sink", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        """Цикл потока записи: забирает из очереди все накопившиеся результаты и записывает их"""
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.error("Ошибка записи отчетов: %s", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: list[tuple[str, str, Any]]) -> None:
+        """Записывает пачку результатов: для json-файлов - только последний результат, для ndjson - все по порядку"""
+        latest: dict[str, Any] = {}
+        lines: dict[str, list[bytes]] = {}
+        for file_name, mode, result in batch:
+            if mode != "ndjson":
+                latest[file_name] = result
+                continue
+            try:
+                lines.setdefault(file_name, []).append(self.dumps(result, mode) + b"\n")
+            except Exception as e:
+                logger.error("Ошибка сериализации отчета для %s: %s", file_name, e)
+
+        for file_name, result in latest.items():
+            try:
+                data = self.dumps(result)
+                write_atomic(file_name, lambda path: _write_bytes(path, data, "wb"))
+            except Exception as e:
+                logger.error("Ошибка записи отчета в %s: %s", file_name, e)
+        for file_name, file_lines in lines.items():
+            try:
+                _write_bytes(file_name, b"".join(file_lines), "ab")
+            except Exception as e:
+                logger.error("Ошибка записи отчета в %s: %s", file_name, e)
+
+
+def _write_bytes(path: str, data: bytes, mode: str) -> None:
+    """Функция записывает байты в файл в указанном режиме"""
+    with open(path, mode) as f:
+        f.write(data)
+
+
+report_sink = ReportSink()
@@ -1,32 +1,41 @@
-import json
-import logging
 from functools import wraps
-from os import getcwd
-from os.path import dirname, join
+from datetime import datetime
 from typing import Any, Callable, Iterable, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 
-from src.utils import filter_by_date_range
+from src.utils import filter_by_date_range, get_date_range
+from src.instrumentation import traced
 from src.logger import logger_setup
+from src.money import divide_rounded, mean_rubles, to_kopecks, to_rubles
+from src.report_sink import SINK_MODES, report_sink
+from src.result_cache import result_cache
+from src.schema import apply_transaction_schema
+from src.storage import WEEKDAYS, TransactionStore
 
 logger = logger_setup()
 
 pd.options.mode.chained_assignment = None
 
 
-def write_to_file(file_name: str = "reports.json") -> Callable:
-    """Декоратор для функций-отчетов, записывающий в файл результат, который возвращает функция, формирующая отчет."""
+def write_to_file(file_name: str = "reports.json", mode: str = "json") -> Callable:
+    """Декоратор для функций-отчетов, записывающий в файл результат, который возвращает функция, формирующая отчет.
+    Запись выполняется в фоновом потоке (report_sink), поэтому не задерживает возврат результата.
+    Имя файла может содержать {report} - оно заменяется на имя функции-отчета.
+    mode="json" - файл перезаписывается последним результатом, mode="ndjson" - результаты дописываются построчно"""
+    if mode not in SINK_MODES:
+        raise ValueError(f"Неизвестный режим записи {mode}")
 
     def wrapper(func: Any) -> Callable:
+        report_file = file_name.format(report=func.__name__)
+
         @wraps(func)
         def inner(*args: Any, **kwargs: Any) -> Any:
 
             result = func(*args, **kwargs)
-
-            with open(file_name, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=4, ensure_ascii=False)
-
+            report_sink.submit(report_file, result, mode)
             return result
 
         return inner
@@ -34,35 +43,211 @@ def write_to_file(file_name: str = "reports.json") -> Callable:
     return wrapper
 
 
-@write_to_file()
-def spending_by_weekday(transactions: pd.DataFrame, date: Optional[str] = None) -> Iterable:
-    """Функция возвращает средние траты в каждый из дней недели за последние три месяца (от переданной даты)
-    Если дата не передана, то берется текущая дата"""
+def compute_spending_by_weekday(
+    transactions: pd.DataFrame | TransactionStore, date: Optional[str] = None
+) -> Optional[str]:
+    """Функция считает средние траты в каждый из дней недели за последние три месяца (от переданной даты)
+    без записи отчета в файл, трассировки и кэша результатов (для пакетной обработки и HTTP-сервиса).
+    Если дата не передана, то берется текущая дата. Для хранилища транзакций отчет считается по агрегатам"""
     try:
+        if isinstance(transactions, TransactionStore):
+            logger.info("Получение сумм и количества трат по дням недели из агрегатов хранилища")
+            by_weekday = transactions.spending_by_weekday(*get_date_range(date, count_month=3))
+            mean_spending = mean_rubles(by_weekday["spent"], by_weekday["count"])
+            spending_day_week = pd.DataFrame({"weekdays": by_weekday["weekday"], "spending": mean_spending})
+            spending_day_week = spending_day_week.sort_values("weekdays")
+            report: Optional[str] = spending_day_week.to_json(orient="records", force_ascii=False)
+            return report
 
         transactions_3_month = filter_by_date_range(transactions, date=date, count_month=3)
         logger.info('Преобразуем столбец "Дата операции" в формат datetime')
-        transactions_3_month["Дата операции"] = pd.to_datetime(
-            transactions_3_month.loc[:, "Дата операции"], format="%d.%m.%Y %H:%M:%S", dayfirst=True
+        # результат filter_by_date_range - выборка из переданного DataFrame, поэтому не изменяется на месте
+        transactions_3_month = transactions_3_month.assign(
+            **{
+                "Дата операции": pd.to_datetime(
+                    transactions_3_month["Дата операции"], format="%d.%m.%Y %H:%M:%S", dayfirst=True
+                )
+            }
         )
 
         logger.info("Добавляем столбец с днем недели и фильтруем только расходы")
         transactions_3_month = transactions_3_month.assign(
             weekdays=transactions_3_month["Дата операции"].dt.day_name()
         )
-        transactions_3_month_spending = transactions_3_month[transactions_3_month["Сумма платежа"] < 0].copy()
-
-        logger.info("Группируем по дням недели и считаем средние траты")
-        spending_day_week = transactions_3_month_spending.groupby("weekdays", as_index=False).agg(
-            {"Сумма платежа": "mean"}
-        )
+        transactions_3_month_spending = transactions_3_month[transactions_3_month["Сумма платежа"] < 0]
 
-        spending_day_week.rename(columns={"Сумма платежа": "spending"}, inplace=True)
-        spending_day_week["spending"] = round(spending_day_week.spending.abs(), 2)
-        return spending_day_week.to_json(orient="records", force_ascii=False)
+        logger.info("Группируем по дням недели и считаем средние траты в копейках")
+        kopecks = pd.Series(to_kopecks(transactions_3_month_spending["Сумма платежа"]))
+        grouped = kopecks.groupby(transactions_3_month_spending["weekdays"].to_numpy())
+        sums, counts = grouped.sum(), grouped.count()
+        spending_day_week = pd.DataFrame({"weekdays": sums.index, "spending": mean_rubles(sums, counts)})
+        report = spending_day_week.to_json(orient="records", force_ascii=False)
+        return report
 
     except Exception as e:
-        logger.error(f"произошла ошибка {e}")
+        logger.error("произошла ошибка %s", e)
+        return None
+
+
+@write_to_file()
+@traced()
+@result_cache.cached(window=get_date_range, count_month=3)
+def spending_by_weekday(transactions: pd.DataFrame | TransactionStore, date: Optional[str] = None) -> Optional[str]:
+    """Функция возвращает средние траты в каждый из дней недели за последние три месяца (от переданной даты)
+    Если дата не передана, то берется текущая дата. Для хранилища транзакций отчет считается по агрегатам.
+    Результат записывается в файл отчета"""
+    return compute_spending_by_weekday(transactions, date)
+
+
+class WeekdaySpendingWindow:
+    """Инкрементальный расчет средних трат по дням недели в скользящем окне (по умолчанию три месяца).
+    Расходы один раз сортируются по дате, в окне хранятся сумма (в копейках) и количество трат по каждому дню недели.
+    При сдвиге окна добавляются только новые операции и вычитаются только выбывшие,
+    поэтому серия ежедневных отчетов стоит O(дней + строк), а не O(дней × строк)"""
+
+    def __init__(self, transactions: pd.DataFrame, count_month: int = 3) -> None:
+        dates = transactions["Дата операции"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+        spending = ((transactions["Сумма платежа"] < 0) & dates.notna()).to_numpy()
+        order = np.argsort(dates[spending].to_numpy(), kind="stable")
+        kopecks = to_kopecks(transactions.loc[spending, "Сумма платежа"])
+
+        self.count_month = count_month
+        self._dates = dates[spending].to_numpy(dtype="datetime64[ns]")[order]
+        self._weekdays = dates[spending].dt.weekday.to_numpy()[order]
+        self._kopecks = kopecks[order]
+        self.reset()
+
+    def reset(self) -> None:
+        """Очищает окно"""
+        self._sums = np.zeros(7, dtype=np.int64)
+        self._counts = np.zeros(7, dtype=np.int64)
+        self._lo = self._hi = 0
+        self.window: Optional[tuple[datetime, datetime]] = None
+
+    def _apply(self, lo: int, hi: int, sign: int) -> None:
+        """Добавляет (sign=1) или вычитает (sign=-1) операции с позициями [lo, hi)"""
+        if hi > lo:
+            weekdays = self._weekdays[lo:hi]
+            sums = np.bincount(weekdays, weights=self._kopecks[lo:hi], minlength=7)
+            self._sums += sign * np.rint(sums).astype(np.int64)
+            self._counts += sign * np.bincount(weekdays, minlength=7)
+
+    def move_to(self, date: Optional[str] = None) -> None:
+        """Сдвигает окно так, чтобы оно заканчивалось на дате date. Окно может двигаться только вперед,
+        при переходе назад оно пересчитывается с нуля"""
+        start, end = get_date_range(date, self.count_month)
+        if self.window is not None and (start < self.window[0] or end < self.window[1]):
+            self.reset()
+        lo = int(np.searchsorted(self._dates, np.datetime64(start, "ns"), "left"))
+        hi = int(np.searchsorted(self._dates, np.datetime64(end, "ns"), "right"))
+        self._apply(self._hi, hi, 1)
+        self._apply(self._lo, lo, -1)
+        self._lo, self._hi, self.window = lo, hi, (start, end)
+
+    def spending(self) -> pd.DataFrame:
+        """Возвращает средние траты по дням недели текущего окна (как spending_by_weekday)"""
+        days = np.flatnonzero(self._counts)
+        mean_spending = mean_rubles(self._sums[days], self._counts[days])
+        result = pd.DataFrame({"weekdays": [WEEKDAYS[day] for day in days], "spending": mean_spending})
+        return result.sort_values("weekdays", ignore_index=True)
+
+    def report(self, date: Optional[str] = None) -> str:
+        """Сдвигает окно на дату date и возвращает JSON со средними тратами по дням недели"""
+        self.move_to(date)
+        report: str = self.spending().to_json(orient="records", force_ascii=False)
+        return report
+
+
+@traced()
+def spending_by_weekday_for_dates(transactions: pd.DataFrame, dates: Iterable[str], count_month: int = 3) -> list[str]:
+    """Функция возвращает отчеты spending_by_weekday сразу для последовательности дат (например, ежедневных),
+    сдвигая одно окно вместо повторной фильтрации и группировки данных для каждой даты"""
+    window = WeekdaySpendingWindow(transactions, count_month)
+    return [window.report(date) for date in dates]
+
+
+GROUP_KEYS: dict[str, Callable[[pd.DataFrame], Any]] = {
+    "weekday": lambda df: pd.Categorical.from_codes(df["Дата операции"].dt.weekday, WEEKDAYS, ordered=True),
+    "month": lambda df: df["Дата операции"].dt.to_period("M"),
+    "day": lambda df: df["Дата операции"].dt.normalize(),
+    "hour": lambda df: df["Дата операции"].dt.hour.astype("int8"),
+    "category": lambda df: df["Категория"],
+    "card": lambda df: df["Номер карты"],
+}
+METRICS = ("spent", "income", "total", "count", "spent_count", "mean_spent")
+
+
+@traced()
+def aggregate_transactions(
+    transactions: pd.DataFrame | TransactionStore,
+    by: str | list[str],
+    metrics: Iterable[str] = ("spent", "spent_count"),
+    start: Optional[datetime | str] = None,
+    end: Optional[datetime | str] = None,
+    as_arrow: bool = False,
+) -> pd.DataFrame | pa.Table:
+    """Функция считает показатели операций в разрезе одного или нескольких ключей за произвольный диапазон дат
+    одной группировкой. Ключи: weekday, month, day, hour, category, card. Показатели: spent (сумма расходов),
+    income (сумма поступлений), total (сумма всех операций), count (количество операций),
+    spent_count (количество расходов), mean_spent (средний расход).
+    Возвращает типизированный DataFrame (или таблицу Arrow при as_arrow=True), в JSON - через aggregation_to_json"""
+    keys = [by] if isinstance(by, str) else list(by)
+    metrics = list(metrics)
+    unknown = [name for name in keys if name not in GROUP_KEYS] + [name for name in metrics if name not in METRICS]
+    if unknown:
+        raise ValueError(f"Неизвестные ключи или показатели: {', '.join(unknown)}")
+
+    start_date = pd.Timestamp(start) if start is not None else None
+    end_date = pd.Timestamp(end) if end is not None else None
+    if isinstance(transactions, TransactionStore):
+        df = transactions.filter_by_date_range(start_date, end_date)
+    else:
+        columns = ["Дата операции", "Сумма платежа", "Категория", "Номер карты"]
+        df = apply_transaction_schema(transactions[[column for column in columns if column in transactions.columns]])
+        in_range = pd.Series(True, index=df.index)
+        if start_date is not None:
+            in_range &= df["Дата операции"] >= start_date
+        if end_date is not None:
+            in_range &= df["Дата операции"] <= end_date
+        df = df[in_range]
+
+    amounts = to_kopecks(df["Сумма платежа"])
+    is_spent = amounts < 0
+    values = pd.DataFrame(
+        {
+            "spent": np.where(is_spent, -amounts, 0),
+            "income": np.where(amounts > 0, amounts, 0),
+            "total": amounts,
+            "count": np.ones(len(df), dtype="int64"),
+            "spent_count": is_spent.astype("int64"),
+        }
+    )
+    needed = set(metrics) | ({"spent", "spent_count"} if "mean_spent" in metrics else set())
+    groups = [pd.Series(GROUP_KEYS[name](df), name=name).reset_index(drop=True) for name in keys]
+
+    result = values[[name for name in values.columns if name in needed]].groupby(groups, observed=True).sum()
+    if "mean_spent" in metrics:
+        has_spent = result["spent_count"].to_numpy() > 0
+        mean_spent = divide_rounded(result["spent"].to_numpy(), np.maximum(result["spent_count"].to_numpy(), 1))
+        result["mean_spent"] = np.where(has_spent, to_rubles(mean_spent), np.nan)
+    money = result.columns.intersection(["spent", "income", "total"])
+    result[money] = to_rubles(result[money].to_numpy())
+    result = result[metrics].reset_index()
+    return pa.Table.from_pandas(result, preserve_index=False) if as_arrow else result
+
+
+def aggregation_to_json(result: pd.DataFrame) -> str:
+    """Функция сериализует результат aggregate_transactions в JSON (периоды и даты - строками)"""
+    result = result.copy()
+    for column in result.columns:
+        if isinstance(result[column].dtype, (pd.PeriodDtype, pd.CategoricalDtype)):
+            result[column] = result[column].astype(str)
+        elif pd.api.types.is_datetime64_any_dtype(result[column]):
+            result[column] = result[column].dt.strftime("%d.%m.%Y")
+    records: str = result.to_json(orient="records", force_ascii=False)
+    return records
 
 
 # if __name__ == '__main__':
@@ -0,0 +1,175 @@
+import copy
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from os.path import exists, join
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from src.cache import write_atomic
+from src.logger import logger_setup
+from src.storage import TransactionStore
+
+logger = logger_setup()
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 256))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR")
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE", "1") != "0"
+
+
+def window_fingerprint(
+    transactions: pd.DataFrame | TransactionStore, start: Optional[datetime], end: Optional[datetime]
+) -> Optional[str]:
+    """Функция возвращает отпечаток операций хранилища, попадающих в диапазон дат [start, end]: по ключам строк
+    (хэшам их содержимого) через индекс даты, поэтому изменения вне диапазона отпечаток не меняют.
+    Для DataFrame возвращает None: отбор строк диапазона и хэширование их столбцов стоят дороже самого отчета"""
+    if isinstance(transactions, TransactionStore):
+        return transactions.window_fingerprint(start, end)
+    return None
+
+
+class ResultCache:
+    """Кэш результатов отчетов за диапазон дат: в памяти (LRU, не более max_entries результатов)
+    и (необязательно) на диске в каталоге directory.
+    Ключ - функция, нормализованный диапазон дат, остальные аргументы и отпечаток операций этого диапазона,
+    поэтому результат пересчитывается только при изменении операций внутри диапазона.
+    Счетчики hits, misses, evictions, disk_hits доступны через stats()"""
+
+    def __init__(
+        self, max_entries: int = RESULT_CACHE_SIZE, directory: Optional[str] = RESULT_CACHE_DIR, enabled: bool = True
+    ) -> None:
+        self.max_entries = max_entries
+        self.directory = directory
+        self.enabled = enabled
+        self._items: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.disk_hits = 0
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счетчики попаданий, промахов и вытеснений и текущий размер кэша в памяти"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "size": len(self._items),
+            }
+
+    def clear(self) -> None:
+        """Очищает кэш в памяти и счетчики (файлы на диске не удаляются)"""
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = self.evictions = self.disk_hits = 0
+
+    def _disk_path(self, key: str) -> Optional[str]:
+        """Путь к файлу результата на диске (None, если дисковый уровень выключен)"""
+        if not self.directory:
+            return None
+        return join(self.directory, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.pickle")
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Возвращает (найден ли результат, результат): сначала из памяти, затем с диска.
+        Результат не копируется: вызывающий код не должен его изменять"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return True, self._items[key]
+        path = self._disk_path(key)
+        if path is not None and exists(path):
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logger.error("Не удалось прочитать результат из кэша: %s", e)
+            else:
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return True, value
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def set(self, key: str, value: Any) -> None:
+        """Сохраняет копию результата в памяти и (если задан каталог) на диске"""
+        value = copy.deepcopy(value)
+        self._remember(key, value)
+        path = self._disk_path(key)
+        if path is not None:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                write_atomic(path, lambda tmp_path: _dump_pickle(tmp_path, value))
+            except OSError as e:
+                logger.error("Не удалось записать результат в кэш: %s", e)
+
+    def _remember(self, key: str, value: Any) -> None:
+        """Добавляет результат в память, вытесняя давно не использованные результаты"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def cached(
+        self, window: Callable[[Optional[str], int], tuple[datetime, datetime]], count_month: int = 1
+    ) -> Callable:
+        """Декоратор для функций вида f(transactions, date=None, ...): диапазон дат получается как
+        window(date, count_month) (count_month берется из аргументов функции, если он там есть).
+        Кэшируются только вызовы с хранилищем транзакций и датой; ошибки (None или строка «Произошла ошибка ...»)
+        не кэшируются"""
+
+        def decorator(func: Callable) -> Callable:
+            signature = inspect.signature(func)
+            name = f"{func.__module__}.{func.__qualname__}"
+
+            @wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                try:
+                    bound = signature.bind(*args, **kwargs)
+                    bound.apply_defaults()
+                    arguments = dict(bound.arguments)
+                    transactions = arguments.pop(next(iter(signature.parameters)))
+                    date = arguments.pop("date", None)
+                    fingerprint = None
+                    if date is not None:
+                        start, end = window(date, arguments.get("count_month", count_month))
+                        fingerprint = window_fingerprint(transactions, start, end)
+                except Exception as e:
+                    logger.error("Результат не кэшируется: %s", e)
+                    fingerprint = None
+                if fingerprint is None:
+                    return func(*args, **kwargs)
+
+                key = f"{name}|{start}|{end}|{sorted(arguments.items())!r}|{fingerprint}"
+                found, value = self.get(key)
+                if found:
+                    return value
+                value = func(*args, **kwargs)
+                if value is not None and not (isinstance(value, str) and value.startswith("Произошла ошибка")):
+                    self.set(key, value)
+                return value
+
+            return wrapper
+
+        return decorator
+
+
+def _dump_pickle(path: str, value: Any) -> None:
+    """Функция записывает значение в файл в формате pickle"""
+    with open(path, "wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+result_cache = ResultCache(enabled=RESULT_CACHE_ENABLED)
@@ -0,0 +1,66 @@
+import argparse
+
+import pandas as pd
+
+from src.logger import logger_setup
+
+logger = logger_setup()
+
+# Канонические типы столбцов выгрузки банка
+DATE_COLUMNS = {"Дата операции": "%d.%m.%Y %H:%M:%S", "Дата платежа": "%d.%m.%Y"}
+CATEGORY_COLUMNS = ["Номер карты", "Статус", "Валюта операции", "Валюта платежа", "Категория"]
+STRING_COLUMNS = ["Описание"]
+AMOUNT_COLUMNS = ["Сумма операции", "Сумма платежа", "Кэшбэк", "Сумма операции с округлением"]
+INTEGER_COLUMNS = {"MCC": "Int16", "Бонусы (включая кэшбэк)": "Int32", "Округление на инвесткопилку": "Int32"}
+
+
+def apply_transaction_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Функция приводит столбцы операций к компактным типам: даты - datetime64, номер карты, категория,
+    статус и валюты - category, описание - строки pyarrow, целочисленные поля - целые типы минимальной ширины.
+    Суммы остаются float64, так как float32 не хранит копейки точно"""
+    df = df.copy()
+    for column, date_format in DATE_COLUMNS.items():
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format=date_format, errors="coerce")
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in STRING_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("string[pyarrow]")
+    for column in AMOUNT_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").round().astype(dtype)
+    return df
+
+
+def memory_usage_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """Функция сравнивает занимаемую память (в байтах) по каждому столбцу до и после приведения к схеме"""
+    report = pd.DataFrame(
+        {
+            "dtype_before": before.dtypes.astype(str),
+            "bytes_before": before.memory_usage(deep=True, index=False),
+            "dtype_after": after.dtypes.astype(str),
+            "bytes_after": after.memory_usage(deep=True, index=False),
+        }
+    )
+    report.loc["Итого"] = ["", report["bytes_before"].sum(), "", report["bytes_after"].sum()]
+    report["ratio"] = (report["bytes_before"] / report["bytes_after"]).astype(float).round(1)
+    return report
+
+
+def main() -> None:
+    """Вывод отчета о памяти: python -m src.schema data/operations.xlsx"""
+    parser = argparse.ArgumentParser(description="Сравнение памяти DataFrame до и после приведения к схеме")
+    parser.add_argument("file", help="xlsx-файл с операциями")
+    args = parser.parse_args()
+
+    before = pd.read_excel(args.file)
+    print(memory_usage_report(before, apply_transaction_schema(before)).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.cache import load_xlsx_cached
+from src.cashback import CashbackRules, load_cashback_rules
+from src.logger import logger_setup
+from src.market import fetch_market_data
+from src.reports import compute_spending_by_weekday
+from src.services import search_transfers_to_individuals
+from src.utils import get_currency_rates, get_date_range, get_stocks, load_user_settings
+from src.views import build_home_page
+
+logger = logger_setup()
+
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", 8080))
+RELOAD_INTERVAL = float(os.getenv("SERVER_RELOAD_INTERVAL", 5))
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+class Dataset:
+    """Загруженные в память операции, отсортированные по дате операции.
+    Периоды выбираются двоичным поиском по датам без просмотра всех строк"""
+
+    def __init__(self, file_name: str) -> None:
+        self.file_name = file_name
+        self.signature = self.file_signature(file_name)
+        df = load_xlsx_cached(file_name)
+        self.df = df.sort_values("Дата операции", ignore_index=True, kind="stable")
+        self.dates = self.df["Дата операции"].to_numpy(dtype="datetime64[ns]")
+        self.loaded = datetime.now()
+
+    @staticmethod
+    def file_signature(file_name: str) -> tuple[int, int]:
+        """Размер и время изменения файла - по ним определяется, что файл нужно перечитать"""
+        stat = os.stat(file_name)
+        return stat.st_size, stat.st_mtime_ns
+
+    def window(self, date: Optional[str], count_month: int = 1) -> pd.DataFrame:
+        """Возвращает операции периода get_date_range(date, count_month)"""
+        start, end = get_date_range(date, count_month)
+        lo = np.searchsorted(self.dates, np.datetime64(start, "ns"), "left")
+        hi = np.searchsorted(self.dates, np.datetime64(end, "ns"), "right")
+        return self.df.iloc[lo:hi]
+
+
+class TransactionService:
+    """HTTP-сервис на asyncio: данные загружаются один раз и перечитываются в фоне при изменении файла.
+    Эндпоинты: /home?date=..., /transfers[?date=...], /weekday[?date=...], /health.
+    Расчеты выполняются в пуле потоков, чтобы цикл событий продолжал принимать запросы"""
+
+    def __init__(
+        self,
+        file_name: str,
+        reload_interval: float = RELOAD_INTERVAL,
+        market_data: Optional[Callable[[], dict]] = None,
+        cashback_rules: Optional[CashbackRules] = None,
+    ) -> None:
+        self.file_name = file_name
+        self.cashback_rules = cashback_rules
+        self.reload_interval = reload_interval
+        self.market_data = market_data or (
+            lambda: fetch_market_data(
+                {"currency_rates": get_currency_rates, "stock_prices": get_stocks}, load_user_settings()
+            )
+        )
+        self.dataset: Optional[Dataset] = None
+        self.routes: dict[str, Callable[[Dataset, Optional[str]], Any]] = {
+            "/home": self.home,
+            "/transfers": self.transfers,
+            "/weekday": self.weekday,
+        }
+
+    def home(self, dataset: Dataset, date: Optional[str]) -> dict:
+        """Данные страницы «Главная» за период с начала месяца по дату"""
+        date = date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return build_home_page(dataset.window(date), date, self.market_data(), self.cashback_rules)
+
+    @staticmethod
+    def transfers(dataset: Dataset, date: Optional[str]) -> str:
+        """Переводы физ. лицам (за месяц по дату, если дата передана)"""
+        return search_transfers_to_individuals(dataset.window(date) if date else dataset.df, date)
+
+    @staticmethod
+    def weekday(dataset: Dataset, date: Optional[str]) -> Optional[str]:
+        """Средние траты по дням недели за три месяца по дату"""
+        return compute_spending_by_weekday(dataset.window(date, count_month=3), date)
+
+    async def load(self) -> None:
+        """Загружает данные в пуле потоков и подменяет текущий набор целиком"""
+        self.dataset = await asyncio.to_thread(Dataset, self.file_name)
+        logger.info("Загружено %s операций из %s", len(self.dataset.df), self.file_name)
+
+    async def watch(self) -> None:
+        """Фоновая задача: перечитывает файл, если изменились его размер или время изменения"""
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if self.dataset is None or Dataset.file_signature(self.file_name) != self.dataset.signature:
+                    await self.load()
+            except Exception as e:
+                logger.error("Ошибка перезагрузки данных: %s", e)
+
+    async def respond(self, method: str, target: str) -> tuple[int, str]:
+        """Возвращает код ответа и JSON-тело для запроса"""
+        if method != "GET":
+            return 405, json.dumps({"error": "Поддерживается только GET"}, ensure_ascii=False)
+        url = urlsplit(target)
+        if url.path == "/health":
+            loaded = self.dataset.loaded.isoformat(timespec="seconds") if self.dataset else None
+            rows = len(self.dataset.df) if self.dataset else 0
+            return 200, json.dumps({"status": "ok", "rows": rows, "loaded": loaded})
+        if url.path not in self.routes:
+            return 404, json.dumps({"error": f"Неизвестный путь {url.path}"}, ensure_ascii=False)
+        if self.dataset is None:
+            return 503, json.dumps({"error": "Данные еще не загружены"}, ensure_ascii=False)
+
+        date = parse_qs(url.query).get("date", [None])[0]
+        if date is not None:
+            try:
+                datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                return 400, json.dumps({"error": "Дата должна быть в формате YYYY-MM-DD HH:MM:SS"}, ensure_ascii=False)
+
+        result = await asyncio.to_thread(self.routes[url.path], self.dataset, date)
+        return 200, result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обрабатывает одно HTTP-соединение (один запрос, затем соединение закрывается)"""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if len(request_line) < 2:
+                status, body = 400, json.dumps({"error": "Некорректный запрос"}, ensure_ascii=False)
+            else:
+                status, body = await self.respond(request_line[0], request_line[1])
+        except Exception as e:
+            logger.error("Произошла ошибка %s", e)
+            status, body = 500, json.dumps({"error": str(e)}, ensure_ascii=False)
+        payload = body.encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Internal Server Error')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + payload
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def start(self, host: str = SERVER_HOST, port: int = SERVER_PORT) -> asyncio.base_events.Server:
+        """Загружает данные, запускает фоновую перезагрузку и начинает принимать соединения"""
+        await self.load()
+        self._watcher = asyncio.create_task(self.watch())
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def serve(self, host: str = SERVER_HOST, port: int = SERVER_PORT) -> None:
+        """Запускает сервис и обслуживает запросы до остановки"""
+        server = await self.start(host, port)
+        logger.info("Сервис запущен на http://%s:%s", host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main() -> None:
+    """Запуск сервиса: python -m src.server data/operations.xlsx --port 8080"""
+    parser = argparse.ArgumentParser(description="HTTP-сервис отчетов по операциям")
+    parser.add_argument("file", help="xlsx-файл с операциями")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL, help="проверка изменений, секунд")
+    args = parser.parse_args()
+    service = TransactionService(args.file, args.reload_interval, cashback_rules=load_cashback_rules())
+    asyncio.run(service.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
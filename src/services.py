@@ -1,31 +1,87 @@
+import re
+from typing import Iterable, Optional
 
-from typing import Iterable
-
+import numpy as np
+import pandas as pd
 from pandas import DataFrame
 
+from src.instrumentation import traced
 from src.logger import logger_setup
+from src.storage import TransactionStore
+from src.utils import filter_by_date_range, format_dates, get_date_range
 
 logger = logger_setup()
 
+TRANSFER_PATTERN = r"^[А-Я][а-я]+\s[А-Я]\.$"
+
+
+class TransferMatcher:
+    """Правила распознавания переводов физ. лицам: шаблоны имен и исключения компилируются один раз.
+    Каждое уникальное описание проверяется только один раз, результат распространяется на все строки"""
+
+    def __init__(
+        self,
+        name_patterns: Iterable[str] = (TRANSFER_PATTERN,),
+        exclusions: Iterable[str] = (),
+        category: str = "Переводы",
+    ) -> None:
+        self.name_patterns = tuple(name_patterns)
+        self.exclusions = tuple(exclusions)
+        self.category = category
+        self.pattern = "|".join(f"(?:{pattern})" for pattern in self.name_patterns)
+        self._names = re.compile(self.pattern)
+        self._exclusions = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in self.exclusions)) if self.exclusions else None
+        )
+
+    def match(self, description: object) -> bool:
+        """Проверяет одно описание: подходит под шаблон имени и не попадает под исключения"""
+        if not isinstance(description, str) or self._names.match(description) is None:
+            return False
+        return self._exclusions is None or self._exclusions.search(description) is None
+
+    def mask(self, descriptions: pd.Series) -> np.ndarray:
+        """Возвращает булев массив совпадений для столбца описаний (object, string[pyarrow] или category)"""
+        if isinstance(descriptions.dtype, pd.CategoricalDtype):
+            codes, uniques = descriptions.cat.codes.to_numpy(), descriptions.cat.categories
+        else:
+            codes, uniques = pd.factorize(descriptions)
+        matched = np.fromiter((self.match(value) for value in uniques), dtype=bool, count=len(uniques))
+        return np.append(matched, False)[codes]
+
 
-def search_transfers_to_individuals(df: DataFrame) -> Iterable:
-    """Функция возвращает JSON со всеми транзакциями, которые относятся к переводам физ. лицам."""
+DEFAULT_TRANSFER_MATCHER = TransferMatcher()
+
+
+@traced()
+def search_transfers_to_individuals(
+    df: DataFrame | TransactionStore, date: Optional[str] = None, matcher: TransferMatcher = DEFAULT_TRANSFER_MATCHER
+) -> Iterable:
+    """Функция возвращает JSON со всеми транзакциями, которые относятся к переводам физ. лицам.
+    Если передана дата, учитываются операции с начала ее месяца по эту дату.
+    Правила распознавания (шаблоны имен, исключения, категория) задаются через matcher"""
     try:
-        logger.info('Выборка транзакций по Категории "Переводы"')
-        transfers_df = df.loc[df["Категория"] == "Переводы"]
+        if isinstance(df, TransactionStore):
+            logger.info('Выборка переводов физ. лицам из хранилища по Категории "%s" и описанию', matcher.category)
+            start_date, end_date = get_date_range(date) if date is not None else (None, None)
+            transfers_df = df.search_by_description(matcher.category, matcher.pattern, start_date, end_date)
+            transfers_df = transfers_df[matcher.mask(transfers_df["Описание"])]
+            return format_dates(transfers_df).to_json(orient="records", force_ascii=False)
+
+        if date is not None:
+            df = filter_by_date_range(df, date)
+
+        logger.info('Выборка транзакций по Категории "%s"', matcher.category)
+        transfers_df = df.loc[df["Категория"] == matcher.category]
 
         logger.info("Выборка транзакций, в описании которых есть имя и первая буква фамилии с точкой")
-        pattern = r"^[А-Я][а-я]+\s[А-Я]\.$"
-        transfers_df = transfers_df[transfers_df["Описание"].str.match(pattern)]
-        return transfers_df.to_json(orient="records", force_ascii=False)
+        transfers_df = transfers_df[matcher.mask(transfers_df["Описание"])]
+        return format_dates(transfers_df).to_json(orient="records", force_ascii=False)
     except Exception as e:
-        logger.error(f"Произошла ошибка {e}")
+        logger.error("Произошла ошибка %s", e)
         return f"Произошла ошибка {e}"
 
 
-
-
-
 # if __name__ == "__main__":
 #     data = {
 #         "Категория": ["Супермаркеты", "Фастфуд", "Супермаркеты", "Переводы"],
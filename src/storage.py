@@ -0,0 +1,366 @@
+import argparse
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from os.path import dirname, exists, join
+from typing import Iterator, Optional
+
+import pandas as pd
+
+from src.cache import CACHE_DIR_NAME, file_sha256, load_xlsx_cached
+from src.logger import logger_setup
+from src.schema import apply_transaction_schema
+
+logger = logger_setup()
+
+STORE_FILE_NAME = "transactions.sqlite"
+
+# Соответствие столбцов выгрузки банка и столбцов таблицы transactions
+COLUMNS = {
+    "Дата операции": "operation_date",
+    "Дата платежа": "payment_date",
+    "Номер карты": "card",
+    "Статус": "status",
+    "Сумма операции": "operation_amount",
+    "Валюта операции": "operation_currency",
+    "Сумма платежа": "amount",
+    "Валюта платежа": "currency",
+    "Кэшбэк": "cashback",
+    "Категория": "category",
+    "MCC": "mcc",
+    "Описание": "description",
+    "Бонусы (включая кэшбэк)": "bonuses",
+    "Округление на инвесткопилку": "rounding",
+    "Сумма операции с округлением": "rounded_amount",
+}
+DATE_FIELDS = ["operation_date", "payment_date"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    row_key INTEGER PRIMARY KEY,
+    operation_date INTEGER,
+    payment_date INTEGER,
+    card TEXT,
+    status TEXT,
+    operation_amount REAL,
+    operation_currency TEXT,
+    amount REAL,
+    currency TEXT,
+    cashback REAL,
+    category TEXT,
+    mcc REAL,
+    description TEXT,
+    bonuses INTEGER,
+    rounding INTEGER,
+    rounded_amount REAL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (operation_date);
+CREATE INDEX IF NOT EXISTS idx_transactions_card ON transactions (card, operation_date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category, operation_date);
+CREATE TABLE IF NOT EXISTS ingested_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    sha256 TEXT
+);
+"""
+# Агрегаты хранят расходы в целых копейках, поэтому инкрементальные обновления не накапливают ошибку округления
+ROLLUPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_card_day (
+    day INTEGER,
+    card TEXT,
+    spent INTEGER,
+    PRIMARY KEY (day, card)
+);
+CREATE TABLE IF NOT EXISTS rollup_day (
+    day INTEGER PRIMARY KEY,
+    spent INTEGER,
+    count INTEGER
+);
+"""
+ROLLUPS_VERSION = 2
+SECONDS_IN_DAY = 86400
+KOPECKS = "CAST(ROUND(amount * 100) AS INTEGER)"
+
+# Агрегаты обновляются по новым строкам из таблицы source: расходы по картам и по дням (для дней недели)
+UPDATE_ROLLUPS = [
+    f"""INSERT INTO rollup_card_day (day, card, spent)
+    SELECT operation_date / 86400, card, -SUM({KOPECKS}) FROM {{source}}
+    WHERE amount < 0 AND card IS NOT NULL AND operation_date IS NOT NULL
+    GROUP BY operation_date / 86400, card
+    ON CONFLICT (day, card) DO UPDATE SET spent = spent + excluded.spent""",
+    f"""INSERT INTO rollup_day (day, spent, count)
+    SELECT operation_date / 86400, -SUM({KOPECKS}), COUNT(*) FROM {{source}}
+    WHERE amount < 0 AND operation_date IS NOT NULL
+    GROUP BY operation_date / 86400
+    ON CONFLICT (day) DO UPDATE SET spent = spent + excluded.spent, count = count + excluded.count""",
+]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def get_store_path(file_name: str) -> str:
+    """Функция возвращает путь к файлу хранилища, расположенному рядом с xlsx-файлом"""
+    return join(dirname(file_name), CACHE_DIR_NAME, STORE_FILE_NAME)
+
+
+def _regexp(pattern: str, value: Optional[str]) -> bool:
+    """Функция для оператора REGEXP в SQLite"""
+    return value is not None and re.match(pattern, value) is not None
+
+
+def _to_epoch(dates: pd.Series) -> pd.Series:
+    """Функция переводит столбец datetime64 в секунды от начала эпохи (NaT -> None)"""
+    seconds = dates.astype("int64") // 10**9
+    return seconds.astype(object).where(dates.notna(), None)
+
+
+def row_keys(df: pd.DataFrame) -> pd.Series:
+    """Функция формирует ключ строки по хэшу ее значений и номеру повторения одинаковых строк,
+    чтобы повторная загрузка пересекающихся выгрузок не создавала дублей"""
+    row_hash = pd.util.hash_pandas_object(df, index=False)
+    occurrence = row_hash.groupby(row_hash).cumcount()
+    keys = pd.util.hash_pandas_object(pd.DataFrame({"hash": row_hash, "n": occurrence}), index=False)
+    return keys.astype("int64")
+
+
+class TransactionStore:
+    """Локальное хранилище транзакций в файле SQLite с индексами по дате операции, номеру карты и категории"""
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        if dirname(db_path):
+            os.makedirs(dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.create_function("REGEXP", 2, _regexp, deterministic=True)
+        self.connection.executescript(SCHEMA + ROLLUPS_SCHEMA)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] < ROLLUPS_VERSION:
+            self.rebuild_rollups()
+
+    def close(self) -> None:
+        """Закрывает соединение с базой данных"""
+        self.connection.close()
+
+    def __enter__(self) -> "TransactionStore":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def ingest_frame(self, df: pd.DataFrame) -> int:
+        """Загружает транзакции из DataFrame, пропуская уже загруженные строки. Возвращает число новых строк"""
+        df = apply_transaction_schema(df.reindex(columns=list(COLUMNS)))
+        df.columns = list(COLUMNS.values())
+        df.insert(0, "row_key", row_keys(df))
+        for field in DATE_FIELDS:
+            df[field] = _to_epoch(df[field])
+        df = df.astype(object).where(df.notna(), None)
+
+        placeholders = ", ".join("?" * len(df.columns))
+        columns = ", ".join(df.columns)
+        self.connection.execute("DROP TABLE IF EXISTS staging")
+        self.connection.execute("CREATE TEMP TABLE staging AS SELECT * FROM transactions WHERE 0")
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO staging ({columns}) VALUES ({placeholders})", df.itertuples(index=False, name=None)
+            )
+            self.connection.execute(
+                "DELETE FROM staging WHERE EXISTS (SELECT 1 FROM transactions WHERE row_key = staging.row_key)"
+            )
+            for sql in UPDATE_ROLLUPS:
+                self.connection.execute(sql.format(source="staging"))
+            added = self.connection.execute(f"INSERT INTO transactions ({columns}) SELECT {columns} FROM staging")
+        self.connection.execute("DROP TABLE staging")
+        return added.rowcount
+
+    def rebuild_rollups(self) -> None:
+        """Пересчитывает агрегаты по всем транзакциям хранилища (таблицы агрегатов создаются заново,
+        чтобы хранилища прежних версий перешли на текущую схему)"""
+        logger.info("Пересчет агрегатов хранилища")
+        self.connection.execute("DROP TABLE IF EXISTS rollup_card_day")
+        self.connection.execute("DROP TABLE IF EXISTS rollup_day")
+        self.connection.executescript(ROLLUPS_SCHEMA)
+        with self.connection:
+            for sql in UPDATE_ROLLUPS:
+                self.connection.execute(sql.format(source="transactions"))
+            self.connection.execute(f"PRAGMA user_version = {ROLLUPS_VERSION}")
+
+    def ingest_xlsx(self, file_name: str) -> int:
+        """Инкрементально загружает xlsx-файл: неизмененный файл пропускается,
+        из измененного добавляются только новые строки. Возвращает число новых строк"""
+        path = os.path.abspath(file_name)
+        stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT size, mtime_ns, sha256 FROM ingested_files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row[:2] == (stat.st_size, stat.st_mtime_ns):
+            logger.info("Файл не изменялся с последней загрузки")
+            return 0
+        sha256 = file_sha256(path)
+        if row is not None and row[2] == sha256:
+            added = 0
+        else:
+            logger.info("Загрузка новых транзакций из xlsx-файла")
+            added = self.ingest_frame(load_xlsx_cached(path))
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO ingested_files VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, sha256),
+            )
+        return added
+
+    def count(self) -> int:
+        """Возвращает количество транзакций в хранилище"""
+        return self.connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def _select(self, sql: str, params: list) -> pd.DataFrame:
+        """Выполняет запрос и возвращает DataFrame со столбцами выгрузки банка"""
+        df = pd.read_sql_query(sql, self.connection, params=params)
+        for field in DATE_FIELDS:
+            if field in df.columns:
+                df[field] = pd.to_datetime(df[field], unit="s")
+        return apply_transaction_schema(df.rename(columns={value: key for key, value in COLUMNS.items()}))
+
+    @staticmethod
+    def _where(
+        start: Optional[datetime], end: Optional[datetime], conditions: Optional[list[str]] = None
+    ) -> tuple[str, list]:
+        """Формирует условие WHERE по диапазону дат операции и дополнительным условиям"""
+        conditions = list(conditions or [])
+        params: list = []
+        if start is not None:
+            conditions.append("operation_date >= ?")
+            params.append(int(pd.Timestamp(start).timestamp()))
+        if end is not None:
+            conditions.append("operation_date <= ?")
+            params.append(int(pd.Timestamp(end).timestamp()))
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+    def window_fingerprint(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> str:
+        """Возвращает отпечаток операций за диапазон дат: путь к базе, количество строк и суммы частей их ключей
+        (хэшей содержимого). Считается одним запросом по индексу даты и меняется только при изменении операций
+        внутри диапазона"""
+        where, params = self._where(start, end)
+        count, low, high = self.connection.execute(
+            f"""SELECT COUNT(*), SUM(row_key % 2147483647), SUM((row_key / 2147483647) % 2147483647)
+            FROM transactions {where}""",
+            params,
+        ).fetchone()
+        return f"store:{os.path.abspath(self.db_path)}:{count}:{low}:{high}"
+
+    def filter_by_date_range(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Возвращает транзакции за указанный диапазон дат операции"""
+        where, params = self._where(start, end)
+        columns = ", ".join(COLUMNS.values())
+        return self._select(f"SELECT {columns} FROM transactions {where} ORDER BY operation_date", params)
+
+    @staticmethod
+    def _split_by_days(start: Optional[datetime], end: Optional[datetime]) -> tuple[list, str, list]:
+        """Делит диапазон на целые дни (берутся из агрегатов) и неполные крайние дни (берутся из транзакций).
+        Возвращает границы целых дней, условие отбора транзакций крайних дней и его параметры"""
+        start_ts = int(pd.Timestamp(start).timestamp()) if start is not None else None
+        end_ts = int(pd.Timestamp(end).timestamp()) if end is not None else None
+        first_day = -(-start_ts // SECONDS_IN_DAY) if start_ts is not None else -(2**62)
+        last_day = (end_ts + 1) // SECONDS_IN_DAY - 1 if end_ts is not None else 2**62
+        if first_day > last_day:
+            return [1, 0], "operation_date BETWEEN ? AND ?", [start_ts, end_ts]
+        edges, params = [], []
+        if start_ts is not None:
+            edges.append("(operation_date >= ? AND operation_date < ?)")
+            params += [start_ts, first_day * SECONDS_IN_DAY]
+        if end_ts is not None:
+            edges.append("(operation_date >= ? AND operation_date <= ?)")
+            params += [(last_day + 1) * SECONDS_IN_DAY, end_ts]
+        return [first_day, last_day], f"({' OR '.join(edges) or '0'})", params
+
+    def spending_by_card(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Возвращает сумму расходов в копейках (столбец spent) по каждой карте за указанный диапазон дат.
+        Целые дни берутся из агрегатов, по транзакциям просматриваются только неполные крайние дни"""
+        days, edges, params = self._split_by_days(start, end)
+        df = pd.read_sql_query(
+            f"""SELECT card, SUM(spent) AS spent FROM (
+                SELECT card, spent FROM rollup_card_day WHERE day BETWEEN ? AND ?
+                UNION ALL
+                SELECT card, -{KOPECKS} FROM transactions WHERE amount < 0 AND card IS NOT NULL AND {edges}
+            ) GROUP BY card ORDER BY card""",
+            self.connection,
+            params=[*days, *params],
+            dtype={"spent": "int64"},
+        )
+        return df.rename(columns={"card": "Номер карты"})
+
+    def spending_by_weekday(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """Возвращает сумму расходов в копейках и количество расходов по дням недели за указанный диапазон дат.
+        Целые дни берутся из агрегатов, по транзакциям просматриваются только неполные крайние дни"""
+        days, edges, params = self._split_by_days(start, end)
+        df = pd.read_sql_query(
+            f"""SELECT (day + 3) % 7 AS weekday, SUM(spent) AS spent, SUM(count) AS count FROM (
+                SELECT day, spent, count FROM rollup_day WHERE day BETWEEN ? AND ?
+                UNION ALL
+                SELECT operation_date / 86400, -{KOPECKS}, 1 FROM transactions WHERE amount < 0 AND {edges}
+            ) GROUP BY weekday""",
+            self.connection,
+            params=[*days, *params],
+            dtype={"spent": "int64", "count": "int64"},
+        )
+        df["weekday"] = [WEEKDAYS[day] for day in df["weekday"]]
+        return df
+
+    def search_by_description(
+        self,
+        category: str,
+        pattern: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Возвращает транзакции указанной категории, описание которых соответствует регулярному выражению"""
+        where, params = self._where(start, end, ["category = ?", "description REGEXP ?"])
+        columns = ", ".join(COLUMNS.values())
+        return self._select(
+            f"SELECT {columns} FROM transactions {where} ORDER BY operation_date", [category, pattern, *params]
+        )
+
+
+def load_transaction_store(file_name: str, db_path: Optional[str] = None) -> TransactionStore | str:
+    """Функция открывает хранилище транзакций и догружает в него указанный xlsx-файл"""
+    logger.info("Проверка существования xlsx-файла")
+    if not exists(file_name):
+        logger.info("Файл не найден")
+        return "Файл не найден"
+    try:
+        store = TransactionStore(db_path or get_store_path(file_name))
+        store.ingest_xlsx(file_name)
+    except Exception as e:
+        logger.error("Произошла ошибка: %s", e)
+        return "Ошибка чтения файла"
+    else:
+        return store
+
+
+@contextmanager
+def closing_store(store: TransactionStore | str) -> Iterator[TransactionStore | str]:
+    """Контекстный менеджер для результата load_transaction_store: хранилище закрывается при выходе из блока,
+    строка с ошибкой загрузки возвращается как есть"""
+    try:
+        yield store
+    finally:
+        if isinstance(store, TransactionStore):
+            store.close()
+
+
+def main() -> None:
+    """Команда загрузки xlsx-файлов в хранилище: python -m src.storage data/operations.xlsx"""
+    parser = argparse.ArgumentParser(description="Загрузка транзакций из xlsx-файлов в хранилище SQLite")
+    parser.add_argument("files", nargs="+", help="xlsx-файлы с операциями")
+    parser.add_argument("--db", help="путь к файлу хранилища (по умолчанию рядом с первым файлом)")
+    args = parser.parse_args()
+
+    with TransactionStore(args.db or get_store_path(args.files[0])) as store:
+        for file_name in args.files:
+            print(f"{file_name}: добавлено строк {store.ingest_xlsx(file_name)}")
+        print(f"Всего транзакций в хранилище: {store.count()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from os.path import splitext
+from typing import Any, Iterable, Iterator, Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from src.logger import logger_setup
+from src.money import card_records, mean_rubles, to_kopecks
+from src.schema import apply_transaction_schema
+from src.utils import get_date_range
+
+logger = logger_setup()
+
+CHUNK_SIZE = 50_000
+
+
+def iter_xlsx_chunks(file_name: str, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Функция построчно читает xlsx-файл (openpyxl в режиме read-only)
+    и возвращает операции частями по chunk_size строк, приведенными к схеме транзакций"""
+    workbook = load_workbook(file_name, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield apply_transaction_schema(pd.DataFrame(batch, columns=header))
+                batch = []
+        if batch:
+            yield apply_transaction_schema(pd.DataFrame(batch, columns=header))
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(file_name: str, chunk_size: int = CHUNK_SIZE, **read_csv_kwargs: Any) -> Iterator[pd.DataFrame]:
+    """Функция читает CSV-файл частями по chunk_size строк, приведенными к схеме транзакций.
+    Дополнительные параметры (sep, decimal, encoding) передаются в pd.read_csv"""
+    with pd.read_csv(file_name, chunksize=chunk_size, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield apply_transaction_schema(chunk)
+
+
+def iter_chunks(file_name: str, chunk_size: int = CHUNK_SIZE, **read_csv_kwargs: Any) -> Iterator[pd.DataFrame]:
+    """Функция выбирает способ потокового чтения по расширению файла (xlsx или csv)"""
+    if splitext(file_name)[1].lower() == ".csv":
+        return iter_csv_chunks(file_name, chunk_size, **read_csv_kwargs)
+    return iter_xlsx_chunks(file_name, chunk_size)
+
+
+def filter_by_date_range_streaming(
+    chunks: Iterable[pd.DataFrame], date: Optional[str] = None, count_month: int = 1
+) -> pd.DataFrame:
+    """Функция отбирает из потока частей операции за период (как filter_by_date_range),
+    в памяти одновременно находятся только одна часть файла и уже отобранные строки"""
+    start_date, end_date = get_date_range(date, count_month)
+    parts: list[pd.DataFrame] = []
+    columns = pd.Index([])
+    for chunk in chunks:
+        columns = chunk.columns
+        part = chunk[chunk["Дата операции"].between(start_date, end_date)]
+        if not part.empty:
+            parts.append(part)
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+
+
+def get_card_information_streaming(chunks: Iterable[pd.DataFrame], date: Optional[str] = None) -> list[dict] | str:
+    """Функция считает расходы и кешбэк по картам (как get_card_information) по потоку частей,
+    храня между частями только суммы по каждой карте"""
+    window = get_date_range(date) if date is not None else None
+    totals = pd.Series(dtype="int64")
+    for chunk in chunks:
+        if window is not None:
+            chunk = chunk[chunk["Дата операции"].between(*window)]
+        spending = chunk[chunk["Сумма платежа"] < 0]
+        kopecks = pd.Series(to_kopecks(spending["Сумма платежа"]), index=spending.index)
+        by_card = kopecks.groupby(spending["Номер карты"].astype(object), dropna=True).sum()
+        totals = totals.add(by_card, fill_value=0).astype("int64")
+
+    logger.info("Подсчет кешбэка по накопленным суммам")
+    totals = totals.sort_index()
+    return card_records(totals.index, totals.to_numpy())
+
+
+def spending_by_weekday_streaming(chunks: Iterable[pd.DataFrame], date: Optional[str] = None) -> str:
+    """Функция считает средние траты по дням недели за три месяца (как spending_by_weekday) по потоку частей,
+    храня между частями только сумму и количество операций для каждого дня недели"""
+    start_date, end_date = get_date_range(date, count_month=3)
+    sums = pd.Series(dtype="int64")
+    counts = pd.Series(dtype="int64")
+    for chunk in chunks:
+        chunk = chunk[chunk["Дата операции"].between(start_date, end_date) & (chunk["Сумма платежа"] < 0)]
+        weekdays = chunk["Дата операции"].dt.day_name().to_numpy()
+        grouped = pd.Series(to_kopecks(chunk["Сумма платежа"])).groupby(weekdays)
+        sums = sums.add(grouped.sum(), fill_value=0).astype("int64")
+        counts = counts.add(grouped.count(), fill_value=0).astype("int64")
+
+    sums, counts = sums.sort_index(), counts.sort_index()
+    result = pd.DataFrame({"weekdays": sums.index, "spending": mean_rubles(sums.to_numpy(), counts.to_numpy())})
+    report: str = result.to_json(orient="records", force_ascii=False)
+    return report
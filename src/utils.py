@@ -6,18 +6,47 @@ from datetime import datetime
 from os.path import  exists
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-API_KEY_CURRENCY = os.getenv("API_KEY_CURRENCY")
-API_KEY_STOCK = os.getenv("API_KEY_STOCK")
 
+from src.cache import load_xlsx_cached
+from src.cashback import CashbackRules
+from src.instrumentation import traced
 from src.logger import logger_setup
+from src.money import card_records, to_kopecks
+from src.result_cache import result_cache
+from src.schema import DATE_COLUMNS, apply_transaction_schema
+from src.storage import TransactionStore
 
 logger = logger_setup()
 
+# настройки внешних API: значения берутся из окружения (и файла .env) при первом обращении, а не при импорте
+API_SETTINGS = {
+    "API_KEY_CURRENCY": None,
+    "API_KEY_STOCK": None,
+    "CURRENCY_API_URL": "https://api.apilayer.com/fixer/latest",
+    "STOCK_API_URL": "https://api.marketstack.com/v1/eod/latest",
+}
+
+
+def api_setting(name: str) -> Optional[str]:
+    """Функция возвращает настройку внешнего API. Файл .env читается только при первом обращении,
+    значение сохраняется как атрибут модуля (поэтому его можно переопределить, например, в тестах)"""
+    if name not in globals():
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        globals()[name] = os.getenv(name, API_SETTINGS[name])
+    return globals()[name]
+
+
+def __getattr__(name: str) -> Optional[str]:
+    """Ленивый доступ к настройкам API как к атрибутам модуля (src.utils.API_KEY_CURRENCY и т.д.)"""
+    if name in API_SETTINGS:
+        return api_setting(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_greetings() -> str:
     """Функция печатает Приветствие — «Доброе утро» / «Добрый день» / «Добрый вечер» / «Доброй ночи»
@@ -39,132 +68,338 @@ def get_greetings() -> str:
     return greetings
 
 
-def export_data_from_xlsx(file_name: str) -> pd.DataFrame | str:
-    """Функция считывание финансовых операций из XLSX-файла"""
+@traced()
+def export_data_from_xlsx(file_name: str, use_cache: bool = False, typed: bool = False) -> pd.DataFrame | str:
+    """Функция считывание финансовых операций из XLSX-файла.
+    При use_cache=True данные читаются через колоночный кэш, уже приведенные к схеме транзакций,
+    при typed=True к схеме приводится результат чтения xlsx-файла"""
     logger.info("Проверка существования xlsx-файла")
     if not exists(file_name):
         logger.info("Файл не найден")
         return "Файл не найден"
     try:
         logger.info("Считывание информации из xlsx-файла")
-        reader = pd.read_excel(file_name)
+        if use_cache:
+            reader = load_xlsx_cached(file_name)
+        else:
+            reader = pd.read_excel(file_name)
+            if typed:
+                reader = apply_transaction_schema(reader)
     except Exception as e:
-        logger.error(f"Произошла ошибка: {e}")
+        logger.error("Произошла ошибка: %s", e)
         return "Ошибка чтения файла"
     else:
         return reader
 
 
-def filter_by_date_range(df: pd.DataFrame, date: Optional[str] = None, count_month: int = 1) -> pd.DataFrame | str:
+def format_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """Функция возвращает DataFrame, в котором столбцы с датами в формате datetime64
+    преобразованы обратно в строки формата выгрузки банка (для вывода в JSON)"""
+    columns = [
+        column for column in DATE_COLUMNS if column in df.columns and pd.api.types.is_datetime64_any_dtype(df[column])
+    ]
+    if not columns:
+        return df
+    df = df.copy()
+    for column in columns:
+        df[column] = df[column].dt.strftime(DATE_COLUMNS[column])
+    return df
+
+
+def get_date_range(date: Optional[str] = None, count_month: int = 1) -> tuple[datetime, datetime]:
+    """Функция возвращает границы периода: с начала месяца, на который выпадает входящая дата,
+    по входящую дату (по умолчанию берется текущая дата) или за указанное количество месяцев."""
+    logger.info("проверка ввода даты")
+    if date is None:
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    logger.info("Преобразуем дату в формат %Y-%m-%d")
+    date_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
+    logger.info("Определяем начало месяца")
+    start_date = date_obj.replace(day=1, hour=0, minute=0, second=0)
+    if count_month > 1:
+        start_date = date_obj - pd.DateOffset(months=count_month)
+    return start_date, date_obj
+
+
+@traced()
+def filter_by_date_range(
+    df: pd.DataFrame | TransactionStore, date: Optional[str] = None, count_month: int = 1
+) -> pd.DataFrame | str:
     """Фильтрует данные с начала месяца, на который выпадает входящая дата,
-    по входящую дату (по умолчанию берется текущая дата) или фильтрует на указанное количество месяцев."""
+    по входящую дату (по умолчанию берется текущая дата) или фильтрует на указанное количество месяцев.
+    Если передано хранилище транзакций, фильтрация выполняется запросом к нему по индексу даты."""
     try:
-        logger.info("проверка ввода даты")
-        if date is None:
-            date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        logger.info("Удаляем значения nan из столбца 'Дата операции'")
-        df["Дата операции"].dropna(inplace=True)
-
-        logger.info("Преобразуем дату в формат %Y-%m-%d")
-        date_obj = datetime.strptime(date, "%Y-%m-%d %H:%M:%S")
-        logger.info("Определяем начало месяца")
-        start_date = date_obj.replace(day=1, hour=0, minute=0, second=0)
-        if count_month > 1:
-            start_date = date_obj - pd.DateOffset(months=count_month)
-
-        logger.info(
-            "Преобразовываем столбец с датами в объект datetime" " и фильтруем данные по дате в указанном диапазоне"
-        )
-        for index, row in df.iterrows():
-            row.loc["Дата операции"] = datetime.strptime(row.loc["Дата операции"], "%d.%m.%Y %H:%M:%S")
-            df["Дата операции"][index] = row.loc["Дата операции"]
+        start_date, date_obj = get_date_range(date, count_month)
 
-        df_by_date = df[(start_date <= df["Дата операции"]) & (df["Дата операции"] <= date_obj)]
+        if isinstance(df, TransactionStore):
+            logger.info("Выборка транзакций из хранилища по диапазону дат")
+            return df.filter_by_date_range(start_date, date_obj)
+
+        logger.info("Преобразовываем столбец с датами в datetime64 и фильтруем данные по дате в указанном диапазоне")
+        dates = df["Дата операции"]
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+
+        df_by_date = df[dates.between(start_date, date_obj)]
     except Exception as e:
-        logger.error(f"Произошла ошибка {e}")
+        logger.error("Произошла ошибка %s", e)
         return f"Произошла ошибка {e}"
     else:
         logger.info("Вывод DataFrame")
         return df_by_date
 
 
-def get_card_information(df: pd.DataFrame) -> list[dict] | str:
+def compute_card_information(
+    df: pd.DataFrame | TransactionStore, date: Optional[str] = None, cashback_rules: Optional[CashbackRules] = None
+) -> list[dict] | str:
     """Функция выводит информацию по каждой карте (последние 4 цифры карты,
-    общая сумма расходов, кешбэк (1 рубль на каждые 100 рублей))"""
+    общая сумма расходов, кешбэк (1 рубль на каждые 100 рублей или по правилам кешбэка cashback_rules)).
+    Если передана дата, учитываются операции с начала ее месяца по эту дату. Результат не кэшируется"""
     try:
-        cards = []
-
-        logger.info("Группировка по номеру карты и подсчет расходов по каждой карте")
-        df = df[df["Сумма платежа"] < 0].copy()
-        group_by_card = df.groupby("Номер карты", dropna=True).agg({"Сумма платежа": "sum"})
+        if cashback_rules is not None:
+            logger.info("Расчет расходов и кешбэка по правилам кешбэка")
+            if date is not None:
+                df = filter_by_date_range(df, date)
+            elif isinstance(df, TransactionStore):
+                df = df.filter_by_date_range()
+            by_card = cashback_rules.calculate(df)
+            return card_records(by_card["Номер карты"], by_card["spent"], by_card["cashback"])
+
+        logger.info("Группировка по номеру карты и подсчет расходов по каждой карте (в копейках)")
+        if isinstance(df, TransactionStore):
+            start_date, end_date = get_date_range(date) if date is not None else (None, None)
+            by_card = df.spending_by_card(start_date, end_date)
+            card_names, spent = by_card["Номер карты"], by_card["spent"].to_numpy()
+        else:
+            if date is not None:
+                df = filter_by_date_range(df, date)
+            df = df[df["Сумма платежа"] < 0]
+            group_by_card = pd.Series(to_kopecks(df["Сумма платежа"]), index=df.index).groupby(
+                df["Номер карты"], dropna=True, observed=True
+            )
+            spent = group_by_card.sum()
+            card_names, spent = spent.index, spent.to_numpy(dtype=np.int64)
 
         logger.info("формирования словаря с информацией по карте")
-        for index, row in group_by_card.iterrows():
-            cards.append(
-                {
-                    "last_digits": str(index)[1:],
-                    "total_spent": round(abs(row.loc["Сумма платежа"]), 2),
-                    "cashback": round(abs(row.loc["Сумма платежа"]) / 100, 2),
-                }
-            )
+        cards = card_records(card_names, spent)
     except Exception as e:
-        logger.error(f"Произошла ошибка {e}")
+        logger.error("Произошла ошибка %s", e)
         return f"Произошла ошибка {e}"
     else:
         logger.info("Вывод словаря")
         return cards
 
 
-def get_top_transactions_by_amount(df: pd.DataFrame) -> list[dict] | str:
-    """Функция возвращает Топ-5 транзакций по сумме платежа"""
+@traced()
+@result_cache.cached(window=get_date_range)
+def get_card_information(
+    df: pd.DataFrame | TransactionStore, date: Optional[str] = None, cashback_rules: Optional[CashbackRules] = None
+) -> list[dict] | str:
+    """Функция выводит информацию по каждой карте (как compute_card_information).
+    Для хранилища транзакций результат за период кэшируется"""
+    return compute_card_information(df, date, cashback_rules)
+
+
+@traced()
+def get_card_information_batch(
+    df: pd.DataFrame, windows: list[tuple[datetime, datetime]], cashback_rules: Optional[CashbackRules] = None
+) -> list[list[dict]]:
+    """Функция выводит информацию по картам (как get_card_information) сразу для нескольких периодов.
+    Расходы один раз сортируются по ключу «карта, дата» и по ним строится одна накопленная сумма в копейках,
+    границы всех периодов всех карт ищутся одним searchsorted, а итог карты за период равен разности накопленных
+    сумм на его границах. Если переданы правила кешбэка, кешбэк каждого периода считается по ним по строкам
+    между его границами"""
+    if not windows:
+        return []
+    dates = df["Дата операции"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+    window_starts = np.array([start for start, _ in windows], dtype="datetime64[ns]")
+    window_ends = np.array([end for _, end in windows], dtype="datetime64[ns]")
+
+    if cashback_rules is not None:
+        order = np.argsort(dates.to_numpy(), kind="stable")
+        sorted_dates = dates.to_numpy()[order]
+        starts = np.searchsorted(sorted_dates, window_starts, "left")
+        ends = np.searchsorted(sorted_dates, window_ends, "right")
+        result: list[list[dict]] = []
+        for start, end in zip(starts, ends):
+            by_card = cashback_rules.calculate(df, order[start:end])
+            result.append(card_records(by_card["Номер карты"], by_card["spent"], by_card["cashback"]))
+        return result
+
+    cards = df["Номер карты"].astype("category")
+    codes = cards.cat.codes.to_numpy().astype(np.int64)
+    amounts = to_kopecks(df["Сумма платежа"])
+    spending = (amounts < 0) & (codes >= 0) & dates.notna().to_numpy()
+    times = dates.to_numpy(dtype="datetime64[ns]")[spending].astype(np.int64)
+    codes, amounts = codes[spending], amounts[spending]
+    if not len(codes):
+        return [[] for _ in windows]
+
+    # карта и дата кодируются одним числом: смещение даты лежит в [0, span - 2], поэтому отрезки карт не пересекаются,
+    # а границы периодов за пределами данных прижимаются к краям отрезка карты
+    first = times.min()
+    span = int(times.max() - first) + 2
+    keys = codes * span + (times - first)
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    total = np.concatenate([[0], np.cumsum(amounts[order])])
+
+    card_offsets = np.arange(len(cards.cat.categories), dtype=np.int64)[:, np.newaxis] * span
+    low = np.clip(window_starts.astype(np.int64) - first, 0, span - 1)
+    high = np.clip(window_ends.astype(np.int64) - first, -1, span - 1)
+    starts = np.searchsorted(keys, card_offsets + low, "left")
+    ends = np.searchsorted(keys, card_offsets + high, "right")
+    spent = total[ends] - total[starts]
+
+    result = []
+    for index in range(len(windows)):
+        used = np.flatnonzero(ends[:, index] > starts[:, index])
+        result.append(card_records(cards.cat.categories[used], spent[used, index]))
+    return result
+
+
+TOP_COLUMNS = ["Категория", "Описание", "Дата платежа", "Сумма платежа"]
+
+
+def _top_positions(abs_amounts: np.ndarray, n: int) -> np.ndarray:
+    """Функция возвращает позиции n наибольших значений по убыванию без полной сортировки:
+    argpartition отбирает n кандидатов, сортируются только они (при равенстве - по порядку строк)"""
+    if n == 0:
+        return np.arange(0)
+    if len(abs_amounts) > n:
+        candidates = np.argpartition(-abs_amounts, n - 1)[:n]
+    else:
+        candidates = np.arange(len(abs_amounts))
+    return candidates[np.lexsort((candidates, -abs_amounts[candidates]))]
+
+
+def _format_top_rows(rows: pd.DataFrame) -> list[dict]:
+    """Функция заменяет пропуски и формирует словари только для уже отобранных строк"""
+    rows = format_dates(rows)
+    return [
+        {
+            "date": "Неизвестна" if pd.isna(date) else date,
+            "amount": 0.0 if pd.isna(amount) else round(float(amount), 2),
+            "category": "Нет категории" if pd.isna(category) else category,
+            "description": "Нет описания" if pd.isna(description) else description,
+        }
+        for date, amount, category, description in zip(
+            rows["Дата платежа"], rows["Сумма платежа"], rows["Категория"], rows["Описание"]
+        )
+    ]
+
+
+@traced()
+def get_top_transactions_by_amount(
+    df: pd.DataFrame, n: int = 5, by: Optional[str] = None
+) -> list[dict] | dict[str, list[dict]] | str:
+    """Функция возвращает Топ-n транзакций по модулю суммы платежа (по умолчанию Топ-5).
+    Если передан by (например, "Номер карты" или "Категория"), возвращает Топ-n для каждой группы за один проход.
+    Исходный DataFrame не изменяется и не сортируется целиком"""
     try:
-        top_transactions = []
-        logger.info("Замена значений nan и сортировка по Сумма платежа")
-
-        df["Категория"] = df["Категория"].fillna("Нет категории")
-        df["Описание"] = df["Описание"].fillna("Нет описания")
-        df["Дата платежа"] = df["Дата платежа"].fillna("Неизвестна")
-        df["Сумма платежа"] = df["Сумма платежа"].fillna(0)
-
-        df.sort_values("Сумма платежа", inplace=True, ignore_index=True, key=lambda x: abs(x), ascending=False)
-
-        logger.info("формирования словаря с информацией по Топ-5 транзакций")
-        for index, row in df.head(5).iterrows():
-            top_transactions.append(
-                {
-                    "date": row.loc["Дата платежа"],
-                    "amount": round(row.loc["Сумма платежа"], 2),
-                    "category": row.loc["Категория"],
-                    "description": row.loc["Описание"],
-                }
-            )
+        missing = [column for column in TOP_COLUMNS if column not in df.columns]
+        if missing:
+            raise KeyError(missing[0])
+
+        logger.info("Отбор Топ-%s транзакций по сумме платежа", n)
+        abs_amounts = np.nan_to_num(np.abs(df["Сумма платежа"].to_numpy(dtype="float64", na_value=np.nan)))
+
+        top_transactions: list[dict] | dict[str, list[dict]]
+        if by is None:
+            top_transactions = _format_top_rows(df.iloc[_top_positions(abs_amounts, max(n, 0))])
+        else:
+            keys = df[by].reset_index(drop=True)
+            selected = pd.Series(abs_amounts).groupby(keys, observed=True, dropna=True, sort=True).nlargest(n)
+            top_transactions = {
+                str(key): _format_top_rows(df.iloc[group.index.get_level_values(-1)])
+                for key, group in selected.groupby(level=0, observed=True, sort=True)
+            }
     except Exception as e:
-        logger.error(f"Произошла ошибка {e}")
+        logger.error("Произошла ошибка %s", e)
         return f"Произошла ошибка {e}"
     else:
-        logger.info("Вывод DataFrame с топ 5")
+        logger.info("Вывод Топ-%s транзакций", n)
         return top_transactions
 
 
-def get_currency_rates() -> list[dict]:
-    """Функция обращается к внешнему API для получения текущего курса валют, указанных в пользовательских настройках"""
+@traced()
+def get_home_page_sections(
+    df: pd.DataFrame | TransactionStore,
+    date: Optional[str] = None,
+    n: int = 5,
+    cashback_rules: Optional[CashbackRules] = None,
+) -> tuple[list[dict], list[dict]] | str:
+    """Функция считает информацию по картам (как get_card_information, с кешбэком по правилам cashback_rules,
+    если они переданы) и Топ-n транзакций (как get_top_transactions_by_amount) с начала месяца по дату
+    за один проход по периоду.
+    Период выбирается один раз, дальше используются только массивы столбцов - без промежуточных копий DataFrame;
+    строки целиком берутся только для отобранных Топ-n транзакций"""
+    try:
+        start_date, end_date = get_date_range(date)
+        if isinstance(df, TransactionStore):
+            df = df.filter_by_date_range(start_date, end_date)
+            positions = np.arange(len(df))
+        else:
+            dates = df["Дата операции"]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+            positions = np.flatnonzero(dates.between(start_date, end_date).to_numpy())
+
+        amounts = df["Сумма платежа"].to_numpy(dtype="float64", na_value=np.nan)[positions]
+        if cashback_rules is not None:
+            by_card = cashback_rules.calculate(df, positions)
+            card_info = card_records(by_card["Номер карты"], by_card["spent"], by_card["cashback"])
+        else:
+            kopecks = to_kopecks(amounts)
+            cards = df["Номер карты"]
+            if isinstance(cards.dtype, pd.CategoricalDtype):
+                codes, names = cards.cat.codes.to_numpy()[positions], cards.cat.categories
+            else:
+                codes, names = pd.factorize(cards.to_numpy()[positions], sort=True)
+
+            spending = (amounts < 0) & (codes >= 0)
+            totals = np.bincount(codes[spending], weights=kopecks[spending], minlength=len(names))
+            used = np.flatnonzero(np.bincount(codes[spending], minlength=len(names)))
+            card_info = card_records(names[used], np.rint(totals[used]).astype(np.int64))
+
+        top = positions[_top_positions(np.nan_to_num(np.abs(amounts)), max(n, 0))]
+        top_transactions = _format_top_rows(df.iloc[top][TOP_COLUMNS])
+    except Exception as e:
+        logger.error("Произошла ошибка %s", e)
+        return f"Произошла ошибка {e}"
+    else:
+        return card_info, top_transactions
+
+
+@traced()
+def load_user_settings(file_name: str = "user_settings.json") -> dict:
+    """Функция считывает пользовательские настройки (валюты и акции) из JSON-файла"""
     logger.info("Открытие файла с пользовательскими настройками")
-    with open(
-        r"user_settings.json", encoding="utf-8"
-    ) as json_file:
-        reader = json.load(json_file)
-        symbols = reader["user_currencies"]
+    with open(file_name, encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+@traced()
+def get_currency_rates(
+    settings: Optional[dict] = None, session: Optional[requests.Session] = None, timeout: Optional[float] = None
+) -> list[dict]:
+    """Функция обращается к внешнему API для получения текущего курса валют, указанных в пользовательских настройках.
+    Можно передать уже считанные настройки, общую HTTP-сессию и таймаут запроса"""
+    reader = settings if settings is not None else load_user_settings()
+    symbols = reader["user_currencies"]
 
     logger.info("запрос курса валют по API")
-    headers = {"apikey": API_KEY_CURRENCY}
+    headers = {"apikey": api_setting("API_KEY_CURRENCY")}
     base = "RUB"
-    url = f"https://api.apilayer.com/fixer/latest?symbols={','.join(reader["user_currencies"])}&base={base}"
-    response = requests.get(url, headers=headers)
+    url = f"{api_setting('CURRENCY_API_URL')}?symbols={','.join(symbols)}&base={base}"
+    response = (session or requests).get(url, headers=headers, timeout=timeout)
 
     logger.info("Проверка status_code")
     if response.status_code != 200:
-        logger.error(f"Ошибка {response.status_code}")
+        logger.error("Ошибка %s", response.status_code)
         raise ValueError("Не удалось получить курс валюты")
 
     result = response.json()
@@ -181,23 +416,23 @@ def get_currency_rates() -> list[dict]:
     return currency_rates
 
 
-def get_stocks() -> list[dict]:
-    """Функция обращается к внешнему API для получения стоимости акций, указанных в пользовательских настройках"""
-    logger.info("Открытие файла с пользовательскими настройками")
-    with open(
-        r"user_settings.json", encoding="utf-8"
-    ) as json_file:
-        reader = json.load(json_file)
-        symbols = reader["user_stocks"]
+@traced()
+def get_stocks(
+    settings: Optional[dict] = None, session: Optional[requests.Session] = None, timeout: Optional[float] = None
+) -> list[dict]:
+    """Функция обращается к внешнему API для получения стоимости акций, указанных в пользовательских настройках.
+    Можно передать уже считанные настройки, общую HTTP-сессию и таймаут запроса"""
+    reader = settings if settings is not None else load_user_settings()
+    symbols = reader["user_stocks"]
 
     logger.info("запрос курса акций по API")
-    url = f"https://api.marketstack.com/v1/eod/latest?access_key={API_KEY_STOCK}&symbols={','.join(symbols)}"
+    url = f"{api_setting('STOCK_API_URL')}?access_key={api_setting('API_KEY_STOCK')}&symbols={','.join(symbols)}"
 
-    response = requests.get(url)
+    response = (session or requests).get(url, timeout=timeout)
 
     logger.info("Проверка status_code")
     if response.status_code != 200:
-        logger.error(f"Ошибка {response.status_code}")
+        logger.error("Ошибка %s", response.status_code)
         raise ValueError("Не удалось получить курс валюты")
 
     result = response.json()
@@ -1,45 +1,120 @@
 import json
 
-from typing import Iterable
+from typing import Iterable, Optional
 
-from src.utils import (export_data_from_xlsx, filter_by_date_range, get_card_information, get_currency_rates,
-                       get_greetings, get_stocks, get_top_transactions_by_amount)
+import numpy as np
+import pandas as pd
 
+from src.utils import (get_card_information_batch, get_currency_rates, get_date_range, get_greetings,
+                       get_home_page_sections, get_stocks, get_top_transactions_by_amount, load_user_settings)
+
+from src.cashback import CashbackRules, load_cashback_rules
+from src.config import OPERATIONS_FILE
+from src.instrumentation import stage, traced
 from src.logger import logger_setup
+from src.market import fetch_market_data
+from src.storage import TransactionStore, closing_store, load_transaction_store
 
 logger = logger_setup()
 
 
-def get_data_for_home_page(date: str) -> Iterable | str:
+@traced()
+def build_home_page(
+    transactions: pd.DataFrame | TransactionStore,
+    date: str,
+    market_data: dict,
+    cashback_rules: Optional[CashbackRules] = None,
+) -> dict:
+    """Функция собирает данные страницы «Главная» (приветствие, карты, Топ-5 транзакций, курсы и акции)
+    для DataFrame или хранилища транзакций без сериализации в JSON"""
+    sections = get_home_page_sections(transactions, date, cashback_rules=cashback_rules)
+    cards, top_transactions = (sections, sections) if isinstance(sections, str) else sections
+    return {
+        "greeting": get_greetings(),
+        "cards": cards,
+        "top_transactions": top_transactions,
+        **market_data,
+    }
+
+
+@traced()
+def get_data_for_home_page(date: str, file_name: str = OPERATIONS_FILE) -> Iterable | str:
     """Основная функция для генерации JSON-ответа для страницы «Главная»
-    (датой и время в формате YYYY-MM-DD HH:MM:SS)"""
+    (датой и время в формате YYYY-MM-DD HH:MM:SS) по операциям из xlsx-файла file_name"""
     try:
-        logger.info("Получение данных из excel, фильтрация данных")
-        main_info = {}
-        card_info = export_data_from_xlsx(
-            r"\data\operations.xlsx"
-        )
-        card_info = filter_by_date_range(card_info, date)
-        card_info_list = get_card_information(card_info)
-
-        logger.info("Формирование словаря с данными")
-        main_info["greeting"] = get_greetings()
-        main_info["cards"] = card_info_list
-        main_info["top_transactions"] = get_top_transactions_by_amount(card_info)
-        main_info["currency_rates"] = get_currency_rates()
-        main_info["stock_prices"] = get_stocks()
+        logger.info("Получение данных из excel")
+        with stage("views.load"):
+            transactions = load_transaction_store(file_name)
+        if isinstance(transactions, str):
+            return transactions
+
+        with closing_store(transactions):
+            logger.info("Параллельное получение курсов валют и стоимости акций")
+            settings = load_user_settings()
+            with stage("views.market_data"):
+                market_data = fetch_market_data(
+                    {"currency_rates": get_currency_rates, "stock_prices": get_stocks}, settings
+                )
+
+            logger.info("Фильтрация данных и формирование словаря с данными")
+            main_info = build_home_page(transactions, date, market_data, load_cashback_rules(settings))
 
         logger.info("Сериализация")
-        main_info_json = json.dumps(main_info, indent=4, ensure_ascii=False)
+        with stage("views.serialization"):
+            main_info_json = json.dumps(main_info, indent=4, ensure_ascii=False)
 
     except Exception as e:
-        logger.error(f"Произошла ошибка {e}")
+        logger.error("Произошла ошибка %s", e)
         return f"Произошла ошибка {e}"
     else:
         logger.info("Вывод json-ответа")
         return main_info_json
 
 
+@traced()
+def get_data_for_home_page_batch(dates: list[str]) -> list[str] | str:
+    """Функция генерирует JSON-ответы для страницы «Главная» сразу для списка дат.
+    Данные и курсы валют/акций загружаются один раз, периоды с начала месяца по каждую дату
+    считаются за один проход по отсортированным данным"""
+    if not dates:
+        return []
+    try:
+        logger.info("Получение данных за все периоды одним запросом")
+        windows = [get_date_range(date) for date in dates]
+        with closing_store(load_transaction_store(OPERATIONS_FILE)) as transactions:
+            if isinstance(transactions, str):
+                return transactions
+            df = transactions.filter_by_date_range(min(start for start, _ in windows), max(end for _, end in windows))
+
+        logger.info("Расчет информации по картам для всех периодов")
+        settings = load_user_settings()
+        cards = get_card_information_batch(df, windows, load_cashback_rules(settings))
+
+        logger.info("Параллельное получение курсов валют и стоимости акций")
+        market_data = fetch_market_data({"currency_rates": get_currency_rates, "stock_prices": get_stocks}, settings)
+        greeting = get_greetings()
+
+        logger.info("Формирование и сериализация ответов")
+        operation_dates = df["Дата операции"].to_numpy()
+        starts = np.searchsorted(operation_dates, np.array([start for start, _ in windows], dtype="datetime64[ns]"))
+        ends = np.searchsorted(operation_dates, np.array([end for _, end in windows], dtype="datetime64[ns]"), "right")
+        pages = []
+        for card_info, start, end in zip(cards, starts, ends):
+            main_info = {
+                "greeting": greeting,
+                "cards": card_info,
+                "top_transactions": get_top_transactions_by_amount(df.iloc[start:end]),
+                **market_data,
+            }
+            pages.append(json.dumps(main_info, indent=4, ensure_ascii=False))
+    except Exception as e:
+        logger.error("Произошла ошибка %s", e)
+        return f"Произошла ошибка {e}"
+    else:
+        logger.info("Вывод json-ответов")
+        return pages
+
+
 #
 #
 # if __name__ == '__main__':
@@ -1,6 +1,34 @@
 import pandas as pd
 import pytest
 
+from src.market import market_cache
+from src.report_sink import report_sink
+from src.result_cache import result_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_market_cache():
+    """Очищает кэш курсов валют и акций, чтобы результаты одного теста не попадали в другой"""
+    market_cache.clear()
+    yield
+    market_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    """Очищает кэш результатов отчетов перед каждым тестом"""
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+@pytest.fixture()
+def reports_in_tmp_path(tmp_path, monkeypatch):
+    """Отчеты с относительными путями (reports.json и др.) записываются во временный каталог теста"""
+    monkeypatch.chdir(tmp_path)
+    yield
+    report_sink.flush()
+
 
 @pytest.fixture()
 def df_test():
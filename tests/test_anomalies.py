@@ -0,0 +1,90 @@
+import json
+
+import pandas as pd
+import pytest
+
+from main import main
+from src.anomalies import AnomalyDetector, detect_anomalies, search_anomalies
+from src.storage import TransactionStore
+
+
+@pytest.fixture()
+def df_history():
+    """Ежедневные покупки в супермаркетах по карте *7197, крупная покупка в конце месяца
+    и серия из пяти операций по карте *5091 за пять минут"""
+    supermarkets = pd.DataFrame(
+        {
+            "Дата операции": [f"{day:02}.12.2021 12:00:00" for day in range(1, 8)],
+            "Номер карты": "*7197",
+            "Сумма платежа": [-100.0, -120.0, -90.0, -110.0, -100.0, -105.0, -1050.0],
+            "Категория": "Супермаркеты",
+            "Описание": "Магнит",
+        }
+    )
+    other = pd.DataFrame(
+        {
+            "Дата операции": ["08.12.2021 12:00:00", "09.12.2021 12:00:00"]
+            + [f"10.12.2021 18:0{minute}:00" for minute in range(5)],
+            "Номер карты": ["*7197", "*7197"] + ["*5091"] * 5,
+            "Сумма платежа": [-2000.0, 5000.0, -10.0, -20.0, -30.0, -40.0, -50.0],
+            "Категория": ["Электроника", "Пополнения"] + ["Фастфуд"] * 5,
+            "Описание": ["DNS", "Пополнение", "Кафе", "Кафе", "Кафе", "Кафе", "Кафе"],
+        }
+    )
+    return pd.concat([supermarkets, other], ignore_index=True)
+
+
+def test_detect_anomalies(df_history):
+    """Тест: крупная трата относительно медианы своей группы и серия операций по карте.
+    Первая трата в новой категории и поступления не отмечаются"""
+    anomalies = detect_anomalies(df_history)
+    assert anomalies.index.tolist() == [6, 13]
+    assert anomalies.loc[6, ["rolling_median", "ratio", "reason"]].tolist() == [102.5, 10.24, "крупная сумма"]
+    assert anomalies.loc[13, ["burst_count", "reason"]].tolist() == [5, "серия операций"]
+
+
+def test_anomaly_detector_incremental(df_history):
+    """Тест: проверка новых операций по хвосту истории дает тот же результат, что и расчет по всей истории"""
+    detector = AnomalyDetector(window=3, min_periods=2)
+    parts = [detector.update(chunk) for chunk in (df_history.iloc[:4], df_history.iloc[4:8], df_history.iloc[8:])]
+    assert pd.concat(parts).equals(detect_anomalies(df_history, window=3, min_periods=2))
+    assert detector.update(df_history.iloc[:0]).empty
+
+
+def test_detect_anomalies_without_spending(tmp_path, df_history):
+    """Тест: пустые данные и данные только с поступлениями не содержат необычных трат"""
+    income = df_history[df_history["Сумма платежа"] > 0]
+    assert detect_anomalies(income).empty
+    assert detect_anomalies(df_history.iloc[:0]).empty
+    detector = AnomalyDetector()
+    assert detector.update(income).empty
+    assert detector.update(df_history).index.tolist() == [6, 13]
+
+    assert json.loads(search_anomalies(income, "2021-12-31 23:59:59")) == []
+    with TransactionStore(str(tmp_path / "transactions.sqlite")) as store:
+        assert json.loads(search_anomalies(store)) == []
+
+
+def test_search_anomalies_period_and_store(tmp_path, df_history):
+    """Тест: статистики берутся из всей истории, выводятся только траты периода; хранилище дает тот же результат"""
+    assert json.loads(search_anomalies(df_history, "2021-11-30 23:59:59")) == []
+    result = json.loads(search_anomalies(df_history, "2021-12-31 23:59:59"))
+    assert [row["Описание"] for row in result] == ["Магнит", "Кафе"]
+
+    with TransactionStore(str(tmp_path / "transactions.sqlite")) as store:
+        store.ingest_frame(df_history)
+        from_store = json.loads(search_anomalies(store, "2021-12-31 23:59:59"))
+    assert [row["reason"] for row in from_store] == ["крупная сумма", "серия операций"]
+
+
+def test_search_anomalies_error():
+    """Тест ошибки при отсутствии нужных столбцов"""
+    assert search_anomalies(pd.DataFrame({"Сумма": [1]})).startswith("Произошла ошибка")
+
+
+def test_main_anomalies_command(tmp_path, df_history, capsys):
+    """Тест команды anomalies"""
+    file_name = tmp_path / "operations.xlsx"
+    df_history.to_excel(file_name, index=False)
+    main(["anomalies", "--file", str(file_name)])
+    assert [row["burst_count"] for row in json.loads(capsys.readouterr().out)] == [1, 5]
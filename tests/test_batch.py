@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from src.batch import collect_statement_files, process_statement, run_batch, summarize_throughput
+from src.reports import compute_spending_by_weekday
+from src.services import search_transfers_to_individuals
+from src.utils import get_card_information
+
+DATE = "2021-12-31 23:59:59"
+
+
+@pytest.fixture()
+def statements(tmp_path, df_test):
+    """Каталог с тремя выписками: две xlsx и одна csv"""
+    df_test.to_excel(tmp_path / "a.xlsx", index=False)
+    df_test.iloc[:3].to_excel(tmp_path / "b.xlsx", index=False)
+    df_test.to_csv(tmp_path / "c.csv", index=False)
+    (tmp_path / "notes.txt").write_text("не выписка", encoding="utf-8")
+    return tmp_path
+
+
+def test_collect_statement_files_from_dir_and_manifest(statements):
+    """Тест получения списка файлов из каталога и из манифестов (текстового и JSON)"""
+    expected = [str(statements / name) for name in ["a.xlsx", "b.xlsx", "c.csv"]]
+    assert collect_statement_files(str(statements)) == expected
+
+    (statements / "manifest.txt").write_text("a.xlsx\n\nc.csv\n", encoding="utf-8")
+    assert collect_statement_files(str(statements / "manifest.txt")) == [expected[0], expected[2]]
+
+    (statements / "manifest.json").write_text(json.dumps(["b.xlsx"]), encoding="utf-8")
+    assert collect_statement_files(str(statements / "manifest.json")) == [expected[1]]
+
+
+def test_run_batch_matches_single_reports(statements, df_test):
+    """Тест: результаты пакетной обработки в процессах совпадают с отчетами по каждому файлу,
+    порядок результатов соответствует списку файлов, прогресс сообщается по каждому файлу"""
+    files = collect_statement_files(str(statements)) + [str(statements / "missing.xlsx")]
+    progress = []
+
+    results = run_batch(files, DATE, max_workers=2, market_data={}, on_progress=lambda *args: progress.append(args))
+
+    assert [result["file"] for result in results] == files
+    assert sorted(done for done, total, _ in progress) == [1, 2, 3, 4]
+    assert results[0]["results"]["weekday"] == compute_spending_by_weekday(df_test, DATE)
+    assert results[0]["results"]["transfers"] == search_transfers_to_individuals(df_test, DATE)
+    assert json.loads(results[0]["results"]["home"])["cards"] == get_card_information(df_test, DATE)
+    assert results[2]["results"] == results[0]["results"]
+    assert [result["rows"] for result in results] == [5, 3, 5, 0]
+    assert results[3]["error"] is not None
+
+
+def test_process_statement_unknown_report(statements):
+    """Тест неизвестного названия отчета"""
+    result = process_statement(str(statements / "a.xlsx"), DATE, ["monthly"])
+    assert result["error"] == "Произошла ошибка Неизвестный отчет monthly"
+
+
+def test_summarize_throughput():
+    """Тест сводки производительности по процессам"""
+    results = [
+        {"pid": 1, "rows": 100, "seconds": 0.5, "error": None},
+        {"pid": 1, "rows": 300, "seconds": 1.5, "error": None},
+        {"pid": 2, "rows": 0, "seconds": 0.0, "error": "Произошла ошибка"},
+    ]
+    assert summarize_throughput(results) == {
+        1: {"files": 2, "errors": 0, "rows": 400, "seconds": 2.0, "rows_per_second": 200.0},
+        2: {"files": 1, "errors": 1, "rows": 0, "seconds": 0.0, "rows_per_second": 0.0},
+    }
@@ -0,0 +1,82 @@
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.cache import get_cache_paths, load_xlsx_cached, write_atomic
+
+
+@pytest.fixture
+def xlsx_file(tmp_path, df_test):
+    """Фикстура, сохраняющая тестовый DataFrame в xlsx-файл"""
+    file_name = str(tmp_path / "operations.xlsx")
+    df_test.to_excel(file_name, index=False)
+    return file_name
+
+
+def test_load_xlsx_cached_creates_typed_cache(xlsx_file):
+    """Тестирует создание кэша с разобранными датами и категориями при первом чтении"""
+    df = load_xlsx_cached(xlsx_file)
+    cache_path, meta_path = get_cache_paths(xlsx_file)
+
+    assert os.path.exists(cache_path) and os.path.exists(meta_path)
+    assert pd.api.types.is_datetime64_any_dtype(df["Дата операции"])
+    assert pd.api.types.is_datetime64_any_dtype(df["Дата платежа"])
+    assert isinstance(df["Категория"].dtype, pd.CategoricalDtype)
+    assert df["Дата операции"][0] == pd.Timestamp("2021-12-21 01:06:22")
+
+
+def test_load_xlsx_cached_hit(xlsx_file):
+    """Тестирует повторное чтение из кэша без обращения к xlsx-файлу"""
+    expected = load_xlsx_cached(xlsx_file)
+    with patch("src.cache.pd.read_excel") as mock_reader:
+        result = load_xlsx_cached(xlsx_file)
+    mock_reader.assert_not_called()
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_load_xlsx_cached_invalidated_on_change(xlsx_file, df_test):
+    """Тестирует пересборку кэша после изменения xlsx-файла"""
+    load_xlsx_cached(xlsx_file)
+    df_test.head(2).to_excel(xlsx_file, index=False)
+    assert len(load_xlsx_cached(xlsx_file)) == 2
+
+
+def test_load_xlsx_cached_touched_file(xlsx_file):
+    """Тестирует, что изменение времени модификации без изменения содержимого не пересобирает кэш"""
+    load_xlsx_cached(xlsx_file)
+    stat = os.stat(xlsx_file)
+    os.utime(xlsx_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with patch("src.cache.pd.read_excel") as mock_reader:
+        load_xlsx_cached(xlsx_file)
+    mock_reader.assert_not_called()
+
+
+def test_write_atomic_unique_temporary_files(tmp_path):
+    """Тестирует, что одновременные записи одного файла идут в разные временные файлы,
+    а при ошибке записи временный файл удаляется"""
+    target = str(tmp_path / "reports.json")
+    temporary = []
+
+    def write(content: str):
+        def write_file(path):
+            temporary.append(path)
+            if content == "outer":
+                write_atomic(target, write("inner"))
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+
+        return write_file
+
+    write_atomic(target, write("outer"))
+    assert len(set(temporary)) == 2
+    with open(target, encoding="utf-8") as f:
+        assert f.read() == "outer"
+
+    def fail(path):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        write_atomic(target, fail)
+    assert os.listdir(tmp_path) == ["reports.json"]
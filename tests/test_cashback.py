@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from src.cashback import CashbackRules, load_cashback_rules
+from src.schema import apply_transaction_schema
+from src.utils import get_card_information, get_home_page_sections
+
+DATE = "2021-12-31 23:59:59"
+RULES = {
+    "excluded_categories": ["Переводы"],
+    "rules": [{"categories": ["Такси"], "rate": 5}, {"name": "Карта 7197", "cards": ["7197"], "rate": 2}],
+}
+
+
+def test_default_rules_match_base_cashback(df_test):
+    """Тест: правила по умолчанию дают тот же кешбэк, что и 1 рубль на каждые 100 рублей"""
+    assert get_card_information(df_test, cashback_rules=CashbackRules()) == get_card_information(df_test)
+
+
+def test_rules_first_match_and_excluded_categories(df_test):
+    """Тест: операция получает ставку первого подошедшего правила, исключенные категории без кешбэка,
+    но в расходах учитываются"""
+    assert get_card_information(df_test, cashback_rules=CashbackRules(RULES)) == [
+        {"last_digits": "5091", "total_spent": 645.78, "cashback": 32.29},
+        {"last_digits": "7197", "total_spent": 1749.25, "cashback": 31.77},
+    ]
+
+
+def test_rules_excluded_mcc_and_caps(df_test):
+    """Тест исключения по MCC, лимита правила и месячного лимита карты"""
+    df = df_test.assign(MCC=[4829, None, 4829, 4121, 9402])
+    rules = {"excluded_mcc": [4829], "rules": [{"mcc": [4121, 9402], "rate": 10, "monthly_cap": 50}]}
+    assert CashbackRules(rules).calculate(df)["cashback"].tolist() == [5000, 5000]
+
+    rules = {"base_rate": 10, "monthly_cap": 10}
+    # у карты *7197 расходы за два разных месяца - лимит применяется к каждому
+    assert CashbackRules(rules).calculate(df)["cashback"].tolist() == [1000, 2000]
+
+
+def test_home_page_sections_with_rules(df_test):
+    """Тест: страница «Главная» считает кешбэк по тем же правилам, что и get_card_information"""
+    rules = CashbackRules(RULES)
+    cards, _ = get_home_page_sections(apply_transaction_schema(df_test), DATE, cashback_rules=rules)
+    assert cards == get_card_information(df_test, DATE, rules)
+    assert cards == [
+        {"last_digits": "5091", "total_spent": 645.78, "cashback": 32.29},
+        {"last_digits": "7197", "total_spent": 160.89, "cashback": 0.0},
+    ]
+
+
+def test_load_cashback_rules(tmp_path):
+    """Тест чтения правил из настроек, из отдельного файла и без правил"""
+    assert load_cashback_rules({"user_currencies": ["USD"]}) is None
+    assert load_cashback_rules(file_name=str(tmp_path / "missing.json")) is None
+    assert repr(load_cashback_rules({"cashback": RULES})) == repr(CashbackRules(RULES))
+
+    (tmp_path / "cashback.json").write_text(json.dumps(RULES), encoding="utf-8")
+    settings_file = tmp_path / "user_settings.json"
+    settings_file.write_text(json.dumps({"cashback": "cashback.json"}), encoding="utf-8")
+    assert repr(load_cashback_rules(file_name=str(settings_file))) == repr(CashbackRules(RULES))
+
+
+def test_cashback_rules_unknown_parameter():
+    """Тест ошибки в настройках правил"""
+    with pytest.raises(ValueError, match="Неизвестные параметры правила кешбэка 1: percent"):
+        CashbackRules({"rules": [{"categories": ["Такси"], "percent": 5}]})
@@ -0,0 +1,68 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.config import OPERATIONS_FILE
+from src.ingest import merge_statements, normalize_statement, read_statement, write_statement
+from src.storage import COLUMNS
+
+
+@pytest.fixture()
+def statements(tmp_path, df_test):
+    """Пересекающиеся выписки: xlsx с двумя листами операций и сводным листом, csv с другими названиями столбцов"""
+    first = tmp_path / "december.xlsx"
+    with pd.ExcelWriter(first) as writer:
+        df_test.iloc[:2].to_excel(writer, sheet_name="Карта 7197", index=False)
+        df_test.iloc[2:4].to_excel(writer, sheet_name="Карта 5091", index=False)
+        pd.DataFrame({"Итого": [1]}).to_excel(writer, sheet_name="Сводка", index=False)
+    second = tmp_path / "other_bank.csv"
+    df_test.iloc[[1, 3, 4, 4]].rename(columns={"Сумма платежа": "Сумма", "Номер карты": "Карта"}).to_csv(
+        second, index=False
+    )
+    return [str(first), str(second)]
+
+
+def test_read_statement_skips_summary_sheets(statements):
+    """Тест чтения всех листов xlsx-файла с пропуском листов без операций"""
+    sheets = read_statement(statements[0])
+    assert [len(sheet) for sheet in sheets] == [2, 2]
+    assert all(list(sheet.columns) == list(COLUMNS) for sheet in sheets)
+
+
+def test_normalize_statement_aliases(df_test):
+    """Тест приведения выписки с другими названиями столбцов к схеме проекта"""
+    df = normalize_statement(df_test.rename(columns={"Сумма платежа": "Сумма"}))
+    assert list(df.columns) == list(COLUMNS)
+    assert df["Сумма платежа"].tolist() == df_test["Сумма платежа"].tolist()
+    assert str(df["Дата операции"].dtype) == "datetime64[ns]"
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_merge_statements_deduplicates_overlaps(statements, df_test, max_workers):
+    """Тест объединения: пересекающиеся операции остаются один раз, повтор внутри одной выписки сохраняется"""
+    merged = merge_statements(statements, max_workers=max_workers)
+    assert len(merged) == 6
+    assert merged["Описание"].tolist() == [
+        "Почта России",
+        "Почта России",
+        "Яндекс Такси",
+        "Перевод Кредитная карта. ТП 10.2 RUR",
+        "sevs.eduerp.ru",
+        "Дмитрий Р.",
+    ]
+    assert merged["Сумма платежа"].sum() == pytest.approx(df_test["Сумма платежа"].sum() - 1588.36)
+
+
+def test_write_statement_round_trip(tmp_path, statements):
+    """Тест записи объединенной выписки и ее повторного чтения"""
+    merged = merge_statements(statements, max_workers=1)
+    file_name = str(tmp_path / "operations.xlsx")
+    write_statement(merged, file_name)
+    assert merge_statements([file_name]).equals(merged)
+
+
+def test_operations_file_is_project_data():
+    """Тест единого пути к файлу операций для main.py и views"""
+    assert os.path.isabs(OPERATIONS_FILE)
+    assert OPERATIONS_FILE.endswith(os.path.join("data", "operations.xlsx"))
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from src.instrumentation import Tracer, tracer
+from src.utils import get_card_information, get_top_transactions_by_amount
+
+
+@pytest.fixture()
+def enabled_tracer():
+    """Включает общую инструментацию на время теста"""
+    tracer.clear()
+    tracer.enable(memory=True)
+    yield tracer
+    tracer.disable()
+    tracer.clear()
+
+
+def test_tracer_disabled_records_nothing(df_test):
+    """Тест: при выключенной инструментации замеры не записываются"""
+    tracer.clear()
+    get_top_transactions_by_amount(df_test)
+    with tracer.stage("stage"):
+        pass
+    assert len(tracer.records) == 0
+
+
+def test_traced_functions_record_time_rows_and_memory(enabled_tracer, df_test):
+    """Тест записи времени, количества строк и пика памяти для функций модулей"""
+    get_card_information(df_test, "2021-12-31 23:59:59")
+    with enabled_tracer.stage("serialization", rows=2):
+        json.dumps(list(range(1000)))
+
+    summary = enabled_tracer.summary()
+    assert summary["utils.get_card_information"]["rows"] == 5
+    assert summary["utils.filter_by_date_range"]["calls"] == 1
+    assert summary["serialization"]["rows"] == 2
+    assert all(item["seconds"] >= 0 and item["peak_bytes"] > 0 for item in summary.values())
+    assert [record["depth"] for record in enabled_tracer.records] == [1, 0, 0]
+
+
+def test_tracer_exports():
+    """Тест экспорта в формате Trace Event и в текстовом формате Prometheus"""
+    local_tracer = Tracer()
+    local_tracer.enable()
+
+    @local_tracer.traced("report")
+    def report():
+        return "[]"
+
+    report()
+    report()
+
+    events = json.loads(local_tracer.to_json_trace())["traceEvents"]
+    assert [(event["name"], event["ph"]) for event in events] == [("report", "X"), ("report", "X")]
+    prometheus = local_tracer.to_prometheus()
+    assert 'bank_stage_calls_total{stage="report"} 2' in prometheus
+    assert "# TYPE bank_stage_seconds_total counter" in prometheus
@@ -0,0 +1,48 @@
+import logging
+from logging.handlers import QueueHandler
+
+from src import logger as logger_module
+from src.logger import logger_setup
+
+
+def test_logger_setup_configures_handlers_once():
+    """Тест: повторные вызовы logger_setup не добавляют обработчики"""
+    first = logger_setup()
+    second = logger_setup()
+    assert first is second
+    assert len(first.handlers) == 1
+    assert isinstance(first.handlers[0], QueueHandler)
+
+
+class ListHandler(logging.Handler):
+    """Обработчик, сохраняющий отформатированные сообщения в список"""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+def test_logger_formats_lazily_in_listener():
+    """Тест: сообщение форматируется из %-аргументов в потоке вывода, а не при вызове логгера"""
+    record = logging.LogRecord("src.logger", logging.INFO, __file__, 1, "Обработка %s файлов", (3,), None)
+    assert logger_setup().handlers[0].prepare(record).args == (3,)
+
+    handler = ListHandler()
+    handler.setFormatter(logging.Formatter(logger_module.LOG_FORMAT))
+    logger_module._stop_listener()
+    logger_module._handlers.append(handler)
+    logger_module._start_listener()
+    try:
+        logger_setup().info("Обработка %s файлов", 3)
+        logger_module._stop_listener()
+    finally:
+        logger_module._handlers.remove(handler)
+        logger_module._start_listener()
+
+    assert len(handler.messages) == 1
+    assert handler.messages[0].endswith(
+        "test_logger.py:test_logger_formats_lazily_in_listener INFO: Обработка 3 файлов"
+    )
@@ -0,0 +1,62 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from main import main
+from src.services import search_transfers_to_individuals
+
+# бюджеты холодного старта (мкс, суммарное время импорта по -X importtime)
+MAIN_IMPORT_BUDGET = 100_000
+HEAVY_MODULES = ["pandas", "numpy", "requests", "dotenv"]
+
+
+def import_report(code: str) -> tuple[str, str]:
+    """Запускает код в отдельном интерпретаторе с -X importtime и возвращает stdout и отчет об импорте"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout, result.stderr
+
+
+def test_main_import_is_light():
+    """Тест холодного старта: main не импортирует тяжелые модули и укладывается в бюджет времени импорта"""
+    stdout, report = import_report(f"import sys, main; print([m for m in {HEAVY_MODULES} if m in sys.modules])")
+    assert json.loads(stdout.replace("'", '"')) == []
+    main_line = [line for line in report.splitlines() if line.endswith("| main")][0]
+    assert int(main_line.split("|")[1]) < MAIN_IMPORT_BUDGET
+
+
+def test_utils_import_does_not_load_dotenv():
+    """Тест: .env читается при первом обращении к настройкам API, а не при импорте src.utils"""
+    stdout, _ = import_report(
+        "import sys, src.utils as u; print('dotenv' in sys.modules); "
+        "u.CURRENCY_API_URL; print('dotenv' in sys.modules)"
+    )
+    assert stdout.split() == ["False", "True"]
+
+
+def test_main_transfers_command(tmp_path, df_test, capsys):
+    """Тест команды transfers с файлом и датой"""
+    file_name = tmp_path / "operations.xlsx"
+    df_test.to_excel(file_name, index=False)
+    main(["transfers", "--file", str(file_name), "--date", "2021-12-31 23:59:59"])
+    result = json.loads(capsys.readouterr().out)
+    expected = json.loads(search_transfers_to_individuals(df_test, "2021-12-31 23:59:59"))
+    assert [row["Описание"] for row in result] == [row["Описание"] for row in expected] == ["Дмитрий Р."]
+
+
+@pytest.mark.parametrize("command", ["home", "transfers", "weekday", "anomalies"])
+def test_main_missing_file(tmp_path, command, capsys):
+    """Тест команд с отсутствующим файлом: выводится сообщение об ошибке загрузки"""
+    main([command, "--file", str(tmp_path / "missing.xlsx")])
+    assert capsys.readouterr().out == "Файл не найден\n"
+
+
+def test_main_invalid_date():
+    """Тест некорректной даты и отсутствия команды"""
+    with pytest.raises(SystemExit, match="YYYY-MM-DD HH:MM:SS"):
+        main(["weekday", "--date", "31.12.2021"])
+    with pytest.raises(SystemExit):
+        main([])
@@ -0,0 +1,91 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.market import TTLCache, fetch_market_data
+from src.utils import get_currency_rates, get_stocks
+
+RESPONSES = {
+    "/fixer": {"success": True, "rates": {"USD": 0.011004, "EUR": 0.009988}},
+    "/eod": {
+        "data": [{"symbol": "AAPL", "adj_close": 220.91}, {"symbol": "TSLA", "adj_close": 216.27}],
+    },
+}
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    """Фикстура, запускающая локальный HTTP-сервер вместо внешних API курсов валют и акций"""
+    requests_log = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_log.append(self.path)
+            time.sleep(0.3)
+            body = json.dumps(RESPONSES[self.path.split("?")[0]]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr("src.utils.CURRENCY_API_URL", f"{base}/fixer")
+    monkeypatch.setattr("src.utils.STOCK_API_URL", f"{base}/eod")
+    yield requests_log
+    server.shutdown()
+
+
+@pytest.fixture
+def settings():
+    return {"user_currencies": ["USD", "EUR"], "user_stocks": ["AAPL", "TSLA"]}
+
+
+def test_fetch_market_data_concurrent_and_cached(stub_server, settings):
+    """Тестирует параллельные запросы к API и повторное получение данных из кэша без обращения к сети"""
+    fetchers = {"currency_rates": get_currency_rates, "stock_prices": get_stocks}
+    cache = TTLCache(ttl=60)
+
+    start = time.perf_counter()
+    result = fetch_market_data(fetchers, settings, cache=cache)
+    elapsed = time.perf_counter() - start
+
+    assert result == {
+        "currency_rates": [{"currency": "USD", "rate": 90.88}, {"currency": "EUR", "rate": 100.12}],
+        "stock_prices": [{"stock": "AAPL", "price": 220.91}, {"stock": "TSLA", "price": 216.27}],
+    }
+    assert elapsed < 0.55
+    assert len(stub_server) == 2
+
+    assert fetch_market_data(fetchers, settings, cache=cache) == result
+    assert len(stub_server) == 2
+
+
+def test_fetch_market_data_timeout(stub_server, settings):
+    """Тестирует прерывание запроса по таймауту"""
+    with pytest.raises(requests.exceptions.Timeout):
+        fetch_market_data({"stock_prices": get_stocks}, settings, timeout=0.05, cache=None)
+
+
+def test_ttl_cache_expired():
+    """Тестирует, что просроченное значение не возвращается"""
+    cache = TTLCache(ttl=-1)
+    cache.set("key", [1])
+    assert cache.get("key") is None
+
+
+def test_ttl_cache_on_disk(tmp_path):
+    """Тестирует сохранение значений кэша на диске между запусками"""
+    file_name = str(tmp_path / "market_cache.json")
+    TTLCache(ttl=60, file_name=file_name).set("key", [{"currency": "USD", "rate": 90.88}])
+    assert TTLCache(ttl=60, file_name=file_name).get("key") == [{"currency": "USD", "rate": 90.88}]
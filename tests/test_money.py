@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.money import card_records, divide_rounded, mean_rubles, to_kopecks, to_rubles
+from src.utils import get_card_information
+
+
+def test_to_kopecks_and_back():
+    """Тест перевода сумм в копейки (с пропусками и строками) и обратно"""
+    kopecks = to_kopecks(pd.Series([-160.89, 0.1, np.nan, "23.6", None]))
+    assert kopecks.dtype == np.int64
+    assert kopecks.tolist() == [-16089, 10, 0, 2360, 0]
+    assert to_rubles(kopecks).tolist() == [-160.89, 0.1, 0.0, 23.6, 0.0]
+    assert to_rubles(-16089) == -160.89
+
+
+@pytest.mark.parametrize(
+    "numerator, denominator, expected",
+    [(7, 2, 4), (-7, 2, -4), (5, 2, 3), (16089, 100, 161), (645, 100, 6), (0, 3, 0)],
+)
+def test_divide_rounded(numerator, denominator, expected):
+    """Тест целочисленного деления с округлением половины от нуля"""
+    assert divide_rounded(numerator, denominator) == expected
+
+
+def test_mean_rubles_and_card_records():
+    """Тест средних и информации по картам из сумм в копейках"""
+    assert mean_rubles(np.array([-100, -64578]), np.array([3, 1])).tolist() == [0.33, 645.78]
+    assert card_records(["*7197"], [-174925]) == [{"last_digits": "7197", "total_spent": 1749.25, "cashback": 17.49}]
+
+
+def test_kopecks_sum_has_no_float_drift():
+    """Тест: сумма миллиона операций по 0.1 рубля считается точно"""
+    df = pd.DataFrame({"Номер карты": ["*7197"] * 1_000_000, "Сумма платежа": [-0.1] * 1_000_000})
+    assert df["Сумма платежа"].sum() != -100_000
+    assert get_card_information(df) == [{"last_digits": "7197", "total_spent": 100000.0, "cashback": 1000.0}]
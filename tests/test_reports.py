@@ -1,10 +1,20 @@
+import io
 import json
 import tempfile
 
 import pandas as pd
+import pyarrow as pa
 import pytest
 
-from src.reports import spending_by_weekday, write_to_file
+from src.report_sink import ReportSink, report_sink
+from src.reports import (WeekdaySpendingWindow, aggregate_transactions, aggregation_to_json,
+                         compute_spending_by_weekday, spending_by_weekday, spending_by_weekday_for_dates,
+                         write_to_file)
+from src.schema import apply_transaction_schema
+from src.storage import TransactionStore
+
+# отчеты с декоратором write_to_file пишут файлы по относительным путям - во временный каталог теста
+pytestmark = pytest.mark.usefixtures("reports_in_tmp_path")
 
 
 def test_spending_by_weekday_success(df_test):
@@ -21,6 +31,17 @@ def test_spending_by_weekday_default(df_test):
     assert spending_by_weekday(df_test) == '[{"weekdays":"Sunday","spending":1588.36}]'
 
 
+def test_compute_spending_by_weekday_without_file(tmp_path, df_test):
+    """Тестирование расчета отчета без записи в файл"""
+    result = compute_spending_by_weekday(df_test, "2022-01-21 17:39:33")
+    report_sink.flush()
+    assert not (tmp_path / "reports.json").exists()
+    assert result == spending_by_weekday(df_test, "2022-01-21 17:39:33")
+    report_sink.flush()
+    assert (tmp_path / "reports.json").exists()
+    assert compute_spending_by_weekday(pd.DataFrame()) is None
+
+
 def test_spending_by_weekday_zero_df():
     """Тестирование при пустом DataFrame"""
     df = pd.DataFrame()
@@ -35,6 +56,7 @@ def test_write_to_file_success_default_file():
         return {'x': x, 'y': y}
 
     my_function(2, 3)
+    report_sink.flush()
 
     file_path = 'reports.json'
     with open(file_path, "r", encoding="utf-8") as file:
@@ -51,9 +73,119 @@ def test_write_to_file_success():
         return {'x': x, 'y': y}
 
     my_function(2, 3)
+    report_sink.flush()
 
     file_path = 'test_reports.json'
     with open(file_path, "r", encoding="utf-8") as file:
         result = json.load(file)
 
     assert result == {"x": 2, "y": 3}
+
+
+def test_write_to_file_report_name_and_ndjson(tmp_path):
+    """Тестирует имя файла по имени отчета и построчную дозапись в режиме ndjson"""
+
+    @write_to_file(str(tmp_path / "{report}.ndjson"), mode="ndjson")
+    def my_report(x):
+        return {"x": x}
+
+    for x in range(3):
+        my_report(x)
+    report_sink.flush()
+
+    with open(tmp_path / "my_report.ndjson", encoding="utf-8") as file:
+        assert [json.loads(line) for line in file] == [{"x": 0}, {"x": 1}, {"x": 2}]
+
+
+def test_write_to_file_unknown_mode():
+    """Тестирует ошибку при неизвестном режиме записи"""
+    with pytest.raises(ValueError):
+        write_to_file("reports.csv", mode="csv")
+
+
+def test_report_sink_keeps_last_result(tmp_path):
+    """Тестирует, что при частых вызовах в json-файле остается последний результат и нет временных файлов"""
+    sink = ReportSink()
+    file_name = str(tmp_path / "report.json")
+    for x in range(100):
+        sink.submit(file_name, {"x": x})
+    sink.flush()
+
+    with open(file_name, encoding="utf-8") as file:
+        assert json.load(file) == {"x": 99}
+    assert [path.name for path in tmp_path.iterdir()] == ["report.json"]
+
+
+def test_report_sink_orjson(tmp_path):
+    """Тестирует запись через orjson (если он установлен)"""
+    pytest.importorskip("orjson")
+    sink = ReportSink(serializer="orjson")
+    sink.submit(str(tmp_path / "report.json"), [{"weekdays": "Пятница", "spending": 645.78}])
+    sink.flush()
+
+    with open(tmp_path / "report.json", encoding="utf-8") as file:
+        assert json.load(file) == [{"weekdays": "Пятница", "spending": 645.78}]
+
+
+def test_spending_by_weekday_for_dates_matches_single_reports(df_test):
+    """Тест: отчеты скользящего окна совпадают с отдельными вызовами spending_by_weekday,
+    в том числе при переходе назад по датам и для DataFrame, приведенного к схеме"""
+    dates = ["2021-12-20 23:59:59", "2021-12-31 23:59:59", "2022-01-21 17:39:33", "2024-09-30 00:00:00"]
+    dates += ["2021-12-21 01:06:22"]
+    expected = [spending_by_weekday(df_test, date) for date in dates]
+    assert spending_by_weekday_for_dates(df_test, dates) == expected
+    assert spending_by_weekday_for_dates(apply_transaction_schema(df_test), dates) == expected
+
+
+def test_weekday_spending_window_drops_expired_days(df_test):
+    """Тест: при сдвиге окна выбывшие операции вычитаются, в пустом окне нет дней недели"""
+    window = WeekdaySpendingWindow(df_test)
+    assert window.report("2022-01-21 17:39:33") == spending_by_weekday(df_test, "2022-01-21 17:39:33")
+    assert window.report("2022-04-01 00:00:00") == spending_by_weekday(df_test, "2022-04-01 00:00:00") == "[]"
+    assert window.spending().empty
+
+
+def test_aggregate_transactions_by_month_and_category(df_test):
+    """Тест группировки по нескольким ключам с несколькими показателями"""
+    result = aggregate_transactions(df_test, ["month", "category"], ["spent", "income", "count", "mean_spent"])
+
+    assert str(result["month"].dtype) == "period[M]"
+    assert aggregation_to_json(result) == (
+        '[{"month":"2021-12","category":"Переводы","spent":160.89,"income":23.6,"count":2,"mean_spent":160.89},'
+        '{"month":"2021-12","category":"Развлечения","spent":0.0,"income":5000.0,"count":1,"mean_spent":null},'
+        '{"month":"2021-12","category":"Такси","spent":645.78,"income":0.0,"count":1,"mean_spent":645.78},'
+        '{"month":"2024-09","category":"Госуслуги","spent":1588.36,"income":0.0,"count":1,"mean_spent":1588.36}]'
+    )
+
+
+def test_aggregate_transactions_weekday_matches_report(df_test):
+    """Тест: средние траты по дням недели за диапазон совпадают с spending_by_weekday"""
+    result = aggregate_transactions(
+        df_test, "weekday", ["mean_spent"], "2021-10-21 17:39:33", "2022-01-21 17:39:33"
+    ).dropna()
+    expected = pd.read_json(io.StringIO(spending_by_weekday(df_test, "2022-01-21 17:39:33")))
+    assert dict(zip(result["weekday"].astype(str), result["mean_spent"])) == dict(
+        zip(expected["weekdays"], expected["spending"])
+    )
+
+
+def test_aggregate_transactions_store_and_arrow(df_test, tmp_path):
+    """Тест расчета по хранилищу транзакций и вывода в виде таблицы Arrow"""
+    with TransactionStore(str(tmp_path / "transactions.sqlite")) as store:
+        store.ingest_frame(df_test)
+        table = aggregate_transactions(store, ["card", "hour"], ["total"], as_arrow=True)
+        period = ("2021-12-01 00:00:00", "2021-12-31 23:59:59")
+        in_period = aggregate_transactions(store, "card", ["spent", "income"], *period)
+
+    assert in_period.equals(aggregate_transactions(df_test, "card", ["spent", "income"], *period))
+    assert in_period["spent"].tolist() == [645.78, 160.89]
+
+    assert isinstance(table, pa.Table)
+    assert table.to_pandas().equals(aggregate_transactions(df_test, ["card", "hour"], ["total"]))
+    assert table.column("total").to_pylist() == [-645.78, 23.6, -1588.36, -160.89, 5000.0]
+
+
+def test_aggregate_transactions_unknown_key(df_test):
+    """Тест неизвестного ключа группировки"""
+    with pytest.raises(ValueError):
+        aggregate_transactions(df_test, "year")
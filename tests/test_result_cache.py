@@ -0,0 +1,59 @@
+import pytest
+
+from src.result_cache import ResultCache, result_cache
+from src.schema import apply_transaction_schema
+from src.storage import TransactionStore
+from src.utils import compute_card_information, get_card_information, get_date_range
+
+DATE = "2021-12-31 23:59:59"
+
+
+@pytest.fixture()
+def store(tmp_path, df_test):
+    with TransactionStore(str(tmp_path / "transactions.sqlite")) as store:
+        store.ingest_frame(df_test)
+        yield store
+
+
+def test_result_cache_hit_does_not_copy(store):
+    """Тест повторного вызова: результат берется из кэша без копирования"""
+    get_card_information(store, DATE)
+    assert get_card_information(store, DATE) is get_card_information(store, DATE)
+    assert result_cache.stats()["hits"] == 2
+
+
+def test_result_cache_skips_frames_and_no_date(df_test, store):
+    """Тест: вызовы с DataFrame (с любыми датами) и вызовы без даты не кэшируются"""
+    get_card_information(df_test, DATE)
+    get_card_information(apply_transaction_schema(df_test), DATE)
+    get_card_information(store)
+    assert result_cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "disk_hits": 0, "size": 0}
+
+
+def test_result_cache_lru_and_disk(tmp_path):
+    """Тест вытеснения давно не использованных результатов и чтения результатов с диска"""
+    cache = ResultCache(max_entries=2, directory=str(tmp_path))
+    for key in ["a", "b", "a", "c"]:
+        cache.set(key, key.upper())
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("a") == (True, "A")
+    assert cache.stats()["disk_hits"] == 0
+
+    restarted = ResultCache(max_entries=2, directory=str(tmp_path))
+    assert restarted.get("b") == (True, "B")
+    assert restarted.get("unknown") == (False, None)
+    assert restarted.stats() == {"hits": 1, "misses": 1, "evictions": 0, "disk_hits": 1, "size": 1}
+
+
+def test_result_cache_store_fingerprint(store, df_test):
+    """Тест: для хранилища результат сбрасывается только при загрузке новых операций за период"""
+    cache = ResultCache()
+    cached_cards = cache.cached(window=get_date_range)(compute_card_information)
+    expected = cached_cards(store, DATE)
+    store.ingest_frame(df_test.iloc[[4]].assign(**{"Дата операции": "09.09.2024 00:00:00"}))
+    assert cached_cards(store, DATE) == expected
+    assert cache.stats()["hits"] == 1
+
+    store.ingest_frame(df_test.iloc[[0]].assign(**{"Дата операции": "22.12.2021 00:00:00"}))
+    assert cached_cards(store, DATE)[1]["total_spent"] == 321.78
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from src.schema import apply_transaction_schema, memory_usage_report
+
+
+def test_apply_transaction_schema(df_test):
+    """Тестирует приведение столбцов операций к компактным типам"""
+    df_test["MCC"] = [5411.0, None, 4829.0, 4121.0, 9402.0]
+    result = apply_transaction_schema(df_test)
+
+    assert result["Дата операции"].dtype == "datetime64[ns]"
+    assert result["Дата платежа"].dtype == "datetime64[ns]"
+    assert isinstance(result["Номер карты"].dtype, pd.CategoricalDtype)
+    assert isinstance(result["Категория"].dtype, pd.CategoricalDtype)
+    assert result["Описание"].dtype == "string[pyarrow]"
+    assert result["Сумма платежа"].dtype == "float64"
+    assert result["MCC"].dtype == "Int16"
+    assert result["MCC"].isna().sum() == 1
+    assert result["Дата операции"][0] == pd.Timestamp("2021-12-21 01:06:22")
+
+
+def test_apply_transaction_schema_idempotent(df_test):
+    """Тестирует, что повторное приведение к схеме не меняет данные"""
+    typed = apply_transaction_schema(df_test)
+    pd.testing.assert_frame_equal(apply_transaction_schema(typed), typed)
+
+
+def test_apply_transaction_schema_keeps_original(df_test):
+    """Тестирует, что исходный DataFrame не изменяется"""
+    apply_transaction_schema(df_test)
+    assert df_test["Дата операции"].dtype == object
+
+
+def test_memory_usage_report(df_test):
+    """Тестирует отчет о памяти до и после приведения к схеме"""
+    df = pd.concat([df_test] * 200, ignore_index=True)
+    report = memory_usage_report(df, apply_transaction_schema(df))
+
+    assert list(report.columns) == ["dtype_before", "bytes_before", "dtype_after", "bytes_after", "ratio"]
+    assert report.loc["Категория", "dtype_after"] == "category"
+    assert report.loc["Итого", "ratio"] > 3
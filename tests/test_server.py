@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from src.reports import compute_spending_by_weekday
+from src.server import Dataset, TransactionService
+from src.services import search_transfers_to_individuals
+from src.views import build_home_page
+
+DATE = "2021-12-31 23:59:59"
+MARKET_DATA = {"currency_rates": [], "stock_prices": []}
+
+
+async def get(port: int, target: str) -> tuple[int, str]:
+    """Отправляет GET-запрос сервису и возвращает код ответа и тело"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), body.decode("utf-8")
+
+
+@pytest.fixture()
+def operations_file(tmp_path, df_test):
+    file_name = tmp_path / "operations.xlsx"
+    df_test.to_excel(file_name, index=False)
+    return str(file_name)
+
+
+def run_service(operations_file, scenario, reload_interval=60):
+    """Запускает сервис на свободном порту, выполняет сценарий и останавливает сервис"""
+
+    async def main():
+        service = TransactionService(operations_file, reload_interval, market_data=lambda: MARKET_DATA)
+        server = await service.start("127.0.0.1", 0)
+        try:
+            return await scenario(service, server.sockets[0].getsockname()[1])
+        finally:
+            service._watcher.cancel()
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(main())
+
+
+def test_server_concurrent_requests(operations_file, df_test):
+    """Тест параллельных запросов: ответы совпадают с прямыми вызовами функций"""
+
+    async def scenario(service, port):
+        targets = ["/home?date=2021-12-31%2023:59:59", "/transfers", "/weekday?date=2021-12-31%2023:59:59"] * 5
+        return await asyncio.gather(*(get(port, target) for target in targets))
+
+    responses = run_service(operations_file, scenario)
+    assert all(status == 200 for status, _ in responses)
+    home = json.loads(responses[0][1])
+    expected = build_home_page(Dataset(operations_file).df, DATE, MARKET_DATA)
+    assert home["cards"] == expected["cards"]
+    assert home["top_transactions"] == expected["top_transactions"]
+    assert json.loads(responses[1][1]) == json.loads(search_transfers_to_individuals(df_test))
+    assert json.loads(responses[2][1]) == json.loads(compute_spending_by_weekday(df_test, DATE))
+
+
+def test_server_errors(operations_file):
+    """Тест ответов на неизвестный путь, некорректную дату и проверки состояния"""
+
+    async def scenario(service, port):
+        return [await get(port, target) for target in ["/unknown", "/home?date=31.12.2021", "/health"]]
+
+    (not_found, _), (bad_date, _), (health_status, health) = run_service(operations_file, scenario)
+    assert not_found == 404
+    assert bad_date == 400
+    assert health_status == 200
+    assert json.loads(health)["rows"] == 5
+
+
+def test_server_reloads_changed_file(operations_file, df_test):
+    """Тест фоновой перезагрузки данных после изменения файла"""
+
+    async def scenario(service, port):
+        df_test.iloc[:2].to_excel(operations_file, index=False)
+        os.utime(operations_file, ns=(0, 10**18))
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if len(service.dataset.df) == 2:
+                break
+        return json.loads((await get(port, "/health"))[1])
+
+    assert run_service(operations_file, scenario, reload_interval=0.05)["rows"] == 2
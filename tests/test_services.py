@@ -1,6 +1,8 @@
 import pandas as pd
+import pytest
 
-from src.services import search_transfers_to_individuals
+from src.schema import apply_transaction_schema
+from src.services import TRANSFER_PATTERN, TransferMatcher, search_transfers_to_individuals
 
 
 def test_search_transfers_to_individuals_success(df_test):
@@ -37,3 +39,30 @@ def test_search_transfers_to_individuals_not_found_name():
     }
     df = pd.DataFrame(data)
     assert search_transfers_to_individuals(df) == "[]"
+
+
+@pytest.mark.parametrize("dtype", [object, "string[pyarrow]", "category"])
+def test_transfer_matcher_mask_matches_str_match(dtype):
+    """Тест: результат TransferMatcher совпадает с .str.match для разных типов столбца описаний"""
+    descriptions = pd.Series(["Иванов И.", "Петров П.", "Сидоров.", None, "Иванов И.", "Перевод с карты"])
+    expected = descriptions.str.match(TRANSFER_PATTERN, na=False).to_numpy()
+    assert TransferMatcher().mask(descriptions.astype(dtype)).tolist() == expected.tolist()
+
+
+def test_transfer_matcher_custom_rules():
+    """Тест пользовательских правил: дополнительный шаблон имени, исключения и другая категория"""
+    matcher = TransferMatcher(
+        name_patterns=[TRANSFER_PATTERN, r"^[А-Я]\.\s[А-Я][а-я]+$"], exclusions=["^Тест"], category="Другое"
+    )
+    data = {
+        "Категория": ["Другое", "Другое", "Другое", "Переводы"],
+        "Описание": ["Иванов И.", "И. Петров", "Тестов Т.", "Сидоров С."],
+    }
+    result = search_transfers_to_individuals(pd.DataFrame(data), matcher=matcher)
+    assert result == '[{"Категория":"Другое","Описание":"Иванов И."},{"Категория":"Другое","Описание":"И. Петров"}]'
+
+
+def test_search_transfers_to_individuals_typed_df(df_test):
+    """Тестирование поиска переводов для DataFrame, приведенного к схеме транзакций"""
+    typed_df = apply_transaction_schema(df_test)
+    assert search_transfers_to_individuals(typed_df) == search_transfers_to_individuals(df_test)
@@ -0,0 +1,117 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_weekday
+from src.services import search_transfers_to_individuals
+from src.storage import TransactionStore, load_transaction_store
+from src.utils import filter_by_date_range, get_card_information
+
+
+@pytest.fixture
+def store(tmp_path, df_test):
+    """Фикстура, создающая хранилище с тестовыми транзакциями"""
+    with TransactionStore(str(tmp_path / "transactions.sqlite")) as store:
+        store.ingest_frame(df_test)
+        yield store
+
+
+def test_ingest_frame_skips_loaded_rows(store, df_test):
+    """Тестирует, что повторная загрузка пересекающихся данных добавляет только новые строки"""
+    extra = pd.DataFrame(
+        {
+            "Дата операции": ["21.12.2021 01:06:22"],
+            "Номер карты": ["*7197"],
+            "Сумма платежа": [-160.89],
+            "Категория": ["Переводы"],
+            "Описание": ["Перевод Кредитная карта. ТП 10.2 RUR"],
+            "Дата платежа": ["21.12.2021"],
+        }
+    )
+    assert store.ingest_frame(pd.concat([df_test, extra])) == 1
+    assert store.ingest_frame(df_test) == 0
+    assert store.count() == 6
+
+
+def test_filter_by_date_range_store(store):
+    """Тестирует выборку из хранилища по диапазону дат"""
+    result = filter_by_date_range(store, "2021-12-21 02:06:15")
+    assert list(result["Дата операции"]) == [
+        pd.Timestamp("2021-12-01 01:06:22"),
+        pd.Timestamp("2021-12-20 12:06:22"),
+        pd.Timestamp("2021-12-21 01:06:22"),
+    ]
+    assert list(result["Описание"]) == ["Дмитрий Р.", "sevs.eduerp.ru", "Перевод Кредитная карта. ТП 10.2 RUR"]
+
+
+def test_get_card_information_store(store, df_test):
+    """Тестирует подсчет расходов по картам в хранилище"""
+    assert get_card_information(store) == get_card_information(df_test)
+    assert get_card_information(store, "2021-12-31 23:59:59") == [
+        {"last_digits": "5091", "total_spent": 645.78, "cashback": 6.46},
+        {"last_digits": "7197", "total_spent": 160.89, "cashback": 1.61},
+    ]
+
+
+def test_search_transfers_to_individuals_store(store, df_test):
+    """Тестирует поиск переводов физ. лицам в хранилище"""
+    result = json.loads(search_transfers_to_individuals(store))
+    expected = json.loads(search_transfers_to_individuals(df_test))
+    assert [{key: row[key] for key in expected[0]} for row in result] == expected
+    assert json.loads(search_transfers_to_individuals(store, "2021-11-30 00:00:00")) == []
+
+
+def test_load_transaction_store_incremental(tmp_path, df_test):
+    """Тестирует инкрементальную загрузку xlsx-файла"""
+    file_name = str(tmp_path / "operations.xlsx")
+    df_test.head(3).to_excel(file_name, index=False)
+    store = load_transaction_store(file_name)
+    assert store.count() == 3
+    assert store.ingest_xlsx(file_name) == 0
+
+    df_test.to_excel(file_name, index=False)
+    assert store.ingest_xlsx(file_name) == 2
+    assert store.count() == 5
+    store.close()
+
+
+def test_load_transaction_store_not_found_file():
+    """Тестирует, если файл не найден"""
+    assert load_transaction_store("") == "Файл не найден"
+
+
+def test_rollups_updated_incrementally(store, df_test):
+    """Тестирует, что агрегаты по картам и дням (в копейках) обновляются только новыми строками"""
+    store.ingest_frame(df_test)
+    extra = df_test.head(1).assign(**{"Дата операции": "21.12.2021 11:00:00"})
+    store.ingest_frame(extra)
+
+    rollup = store.connection.execute(
+        "SELECT card, spent FROM rollup_card_day WHERE day = ?",
+        (int(pd.Timestamp("2021-12-21").timestamp()) // 86400,),
+    ).fetchall()
+    assert rollup == [("*7197", 32178)]
+    assert store.connection.execute("SELECT SUM(count) FROM rollup_day").fetchone()[0] == 4
+
+
+def test_rollups_rebuilt_for_old_store(tmp_path, df_test):
+    """Тестирует пересчет агрегатов при открытии хранилища, созданного без них"""
+    db_path = str(tmp_path / "transactions.sqlite")
+    with TransactionStore(db_path) as store:
+        store.ingest_frame(df_test)
+        store.connection.execute("DELETE FROM rollup_card_day")
+        store.connection.execute("PRAGMA user_version = 0")
+        store.connection.commit()
+    with TransactionStore(db_path) as store:
+        assert get_card_information(store) == get_card_information(df_test)
+
+
+@pytest.mark.parametrize(
+    "date", ["2021-12-21 01:06:22", "2021-12-21 01:06:21", "2021-12-31 23:59:59", "2022-01-21 17:39:33"]
+)
+@pytest.mark.usefixtures("reports_in_tmp_path")
+def test_spending_by_card_and_weekday_from_rollups(store, df_test, date):
+    """Тестирует, что отчеты по агрегатам совпадают с расчетом по исходным транзакциям на границах дней"""
+    assert get_card_information(store, date) == get_card_information(df_test, date)
+    assert spending_by_weekday(store, date) == spending_by_weekday(df_test.copy(), date)
@@ -0,0 +1,56 @@
+import json
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_weekday
+from src.streaming import (filter_by_date_range_streaming, get_card_information_streaming, iter_chunks,
+                           spending_by_weekday_streaming)
+from src.utils import filter_by_date_range, get_card_information
+
+
+@pytest.fixture(params=["xlsx", "csv"])
+def statement_file(request, tmp_path, df_test):
+    """Фикстура, сохраняющая тестовые операции в xlsx- или csv-файл"""
+    file_name = str(tmp_path / f"operations.{request.param}")
+    if request.param == "xlsx":
+        df_test.to_excel(file_name, index=False)
+    else:
+        df_test.to_csv(file_name, index=False)
+    return file_name
+
+
+def test_iter_chunks(statement_file):
+    """Тестирует чтение файла частями с разобранными датами"""
+    chunks = list(iter_chunks(statement_file, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert all(pd.api.types.is_datetime64_any_dtype(chunk["Дата операции"]) for chunk in chunks)
+
+
+def test_filter_by_date_range_streaming(statement_file, df_test):
+    """Тестирует отбор операций за период по частям"""
+    result = filter_by_date_range_streaming(iter_chunks(statement_file, chunk_size=2), "2022-01-21 02:02:02", 3)
+    assert list(result["Описание"]) == list(filter_by_date_range(df_test, "2022-01-21 02:02:02", 3)["Описание"])
+
+
+def test_filter_by_date_range_streaming_not_found(statement_file):
+    """Тестирует отбор операций за период, в котором нет ни одной операции"""
+    result = filter_by_date_range_streaming(iter_chunks(statement_file, chunk_size=2), "2020-01-21 02:02:02")
+    assert result.empty
+    assert "Описание" in result.columns
+
+
+def test_get_card_information_streaming(statement_file, df_test):
+    """Тестирует подсчет расходов по картам по частям"""
+    assert get_card_information_streaming(iter_chunks(statement_file, chunk_size=2)) == get_card_information(df_test)
+    assert get_card_information_streaming(iter_chunks(statement_file, chunk_size=2), "2021-12-31 23:59:59") == [
+        {"last_digits": "5091", "total_spent": 645.78, "cashback": 6.46},
+        {"last_digits": "7197", "total_spent": 160.89, "cashback": 1.61},
+    ]
+
+
+@pytest.mark.usefixtures("reports_in_tmp_path")
+def test_spending_by_weekday_streaming(statement_file, df_test):
+    """Тестирует средние траты по дням недели по частям"""
+    result = spending_by_weekday_streaming(iter_chunks(statement_file, chunk_size=2), "2022-01-21 17:39:33")
+    assert json.loads(result) == json.loads(spending_by_weekday(df_test, "2022-01-21 17:39:33"))
@@ -1,12 +1,15 @@
 from datetime import datetime
 from unittest.mock import Mock, patch
 
+import numpy as np
 import pandas as pd
 import pytest
 from freezegun import freeze_time
 
-from src.utils import (export_data_from_xlsx, filter_by_date_range, get_card_information, get_currency_rates,
-                       get_greetings, get_stocks, get_top_transactions_by_amount)
+from src.schema import apply_transaction_schema
+from src.utils import (export_data_from_xlsx, filter_by_date_range, get_card_information, get_card_information_batch,
+                       get_currency_rates, get_date_range, get_greetings, get_home_page_sections, get_stocks,
+                       get_top_transactions_by_amount)
 
 
 @freeze_time("06:00:19")
@@ -144,6 +147,15 @@ def test_filter_by_date_range(df_test):
     assert result.to_dict() == executed.to_dict()
 
 
+def test_filter_by_date_range_datetime_column_and_nan(df_test):
+    """Тест фильтрации, если столбец с датами уже в формате datetime64 и содержит пропуски"""
+    df_test.loc[0, "Дата операции"] = None
+    df_test["Дата операции"] = pd.to_datetime(df_test["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    result = filter_by_date_range(df_test, "2021-12-21 02:06:15")
+    assert list(result.index) == [1, 2]
+    assert pd.api.types.is_datetime64_any_dtype(result["Дата операции"])
+
+
 def test_filter_by_date_range_error():
     """Тест фильтрации данных при отсутствии столбца с датами"""
     df = pd.DataFrame({"Номер карты": ["*7197", "*7197", "*5091"], "Сумма платежа": [-160.89, 5000, 23.60]})
@@ -166,6 +178,31 @@ def test_get_card_information_zero_df():
     assert result == "Произошла ошибка 'Сумма платежа'"
 
 
+def test_get_card_information_batch(df_test):
+    """Тест расчета информации по картам сразу для нескольких периодов"""
+    dates = ["2021-12-20 23:59:59", "2021-12-31 23:59:59", "2022-01-21 17:39:33"]
+    result = get_card_information_batch(df_test, [get_date_range(date) for date in dates])
+    assert result == [get_card_information(df_test, date) for date in dates]
+    assert result[0] == [] and result[2] == []
+    assert get_card_information_batch(df_test, []) == []
+
+
+def test_get_card_information_batch_many_cards():
+    """Тест: для многих карт результат совпадает с расчетом по каждому периоду, в том числе за пределами данных"""
+    rng = np.random.default_rng(0)
+    dates = pd.Timestamp("2021-11-01") + pd.to_timedelta(rng.integers(0, 90 * 86400, 3000), unit="s")
+    df = pd.DataFrame(
+        {
+            "Дата операции": dates.strftime("%d.%m.%Y %H:%M:%S"),
+            "Номер карты": [f"*{card:04}" for card in rng.integers(0, 200, 3000)],
+            "Сумма платежа": np.round(rng.uniform(-5000, 1000, 3000), 2),
+        }
+    )
+    periods = ["2021-10-15 00:00:00", "2021-11-30 23:59:59", "2021-12-20 12:00:00", "2022-01-31 23:59:59"]
+    result = get_card_information_batch(df, [get_date_range(date) for date in periods + ["2022-03-01 00:00:00"]])
+    assert result == [get_card_information(df, date) for date in periods] + [[]]
+
+
 def test_get_top_transactions_by_amount_success(df_test):
     """Тестирование вывода топ-5 транзакций по сумме платежа"""
     execute = [
@@ -184,12 +221,57 @@ def test_get_top_transactions_by_amount_success(df_test):
     assert get_top_transactions_by_amount(df_test) == execute
 
 
+def test_get_top_transactions_by_amount_typed_df(df_test):
+    """Тестирование топ-5 транзакций для DataFrame из кэша (даты в datetime64, категории в category)"""
+    result = get_top_transactions_by_amount(apply_transaction_schema(df_test))
+    assert result == get_top_transactions_by_amount(df_test)
+
+
+def test_get_top_transactions_by_amount_does_not_mutate(df_test):
+    """Тест: исходный DataFrame не сортируется и пропуски в нем не заменяются"""
+    df_test.loc[0, "Категория"] = None
+    expected = df_test.copy()
+    result = get_top_transactions_by_amount(df_test, n=len(df_test))
+    assert df_test.equals(expected)
+    assert len(result) == len(df_test)
+    assert "Нет категории" in [item["category"] for item in result]
+
+
+def test_get_top_transactions_by_amount_custom_n(df_test):
+    """Тест топ-n транзакций при n, отличном от 5"""
+    assert get_top_transactions_by_amount(df_test, n=2) == get_top_transactions_by_amount(df_test)[:2]
+    assert get_top_transactions_by_amount(df_test, n=0) == []
+
+
+def test_get_top_transactions_by_amount_by_card(df_test):
+    """Тест топ-n транзакций отдельно для каждой карты"""
+    result = get_top_transactions_by_amount(df_test, n=1, by="Номер карты")
+    for card, top in result.items():
+        assert top == get_top_transactions_by_amount(df_test[df_test["Номер карты"] == card], n=1)
+    assert set(result) == set(df_test["Номер карты"].dropna())
+
+
 def test_get_top_transactions_by_amount_zero_df():
     """Тест пустого dataFrame"""
     result = get_top_transactions_by_amount(pd.DataFrame())
     assert result == "Произошла ошибка 'Категория'"
 
 
+@pytest.mark.parametrize("date", ["2021-12-20 23:59:59", "2021-12-31 23:59:59", "2024-09-30 00:00:00"])
+@pytest.mark.parametrize("typed", [False, True])
+def test_get_home_page_sections(df_test, date, typed):
+    """Тест расчета карт и Топ-5 за один проход: совпадает с get_card_information и get_top_transactions_by_amount"""
+    df = apply_transaction_schema(df_test) if typed else df_test
+    cards, top = get_home_page_sections(df, date)
+    assert cards == get_card_information(df, date)
+    assert top == get_top_transactions_by_amount(filter_by_date_range(df, date))
+
+
+def test_get_home_page_sections_error():
+    """Тест расчета карт и Топ-5 для некорректных данных"""
+    assert get_home_page_sections(pd.DataFrame(), "2021-12-20 23:59:59") == "Произошла ошибка 'Дата операции'"
+
+
 def test_get_currency_rates_success():
     """Тестирует успешное получение курса валют для указанных в настройках пользователя валют"""
     mock_response = Mock()
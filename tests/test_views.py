@@ -1,13 +1,22 @@
+import json
+import sqlite3
 from unittest.mock import patch
 
-from src.views import get_data_for_home_page
+import pytest
 
+from src.storage import TransactionStore
+from src.views import get_data_for_home_page, get_data_for_home_page_batch
 
+
+@patch("src.views.load_transaction_store")
 @patch("src.views.get_currency_rates")
 @patch("src.views.get_stocks")
 @patch("src.views.json.dumps")
-def test_get_data_for_home_page_success(mock_json_dumps, mock_get_currency_rates, mock_get_stocks, result_json):
+def test_get_data_for_home_page_success(
+    mock_json_dumps, mock_get_currency_rates, mock_get_stocks, mock_store, result_json, df_test
+):
     """Тестирование успешного формирования JSON-ответа для страницы «Главная»"""
+    mock_store.return_value = df_test
     mock_get_currency_rates.return_value = [{"currency": "USD", "rate": 91.0}, {"currency": "EUR", "rate": 100.52}]
     mock_get_stocks.return_value = [
         {"stock": "AAPL", "price": 220.11},
@@ -20,3 +29,78 @@ def test_get_data_for_home_page_success(mock_json_dumps, mock_get_currency_rates
     result = get_data_for_home_page("2021-12-20 06:20:03")
     assert result == result_json
     mock_json_dumps.assert_called_once()
+
+
+@patch("src.views.fetch_market_data")
+@patch("src.views.load_transaction_store")
+def test_get_data_for_home_page_batch(mock_store, mock_market, tmp_path, df_test):
+    """Тестирование формирования JSON-ответов для нескольких дат за одну загрузку данных"""
+    store = TransactionStore(str(tmp_path / "transactions.sqlite"))
+    store.ingest_frame(df_test)
+    mock_store.return_value = store
+    mock_market.return_value = {"currency_rates": [], "stock_prices": []}
+
+    result = get_data_for_home_page_batch(["2021-12-20 23:59:59", "2021-12-31 23:59:59", "2024-09-30 00:00:00"])
+
+    pages = [json.loads(page) for page in result]
+    assert [page["cards"] for page in pages] == [
+        [],
+        [
+            {"last_digits": "5091", "total_spent": 645.78, "cashback": 6.46},
+            {"last_digits": "7197", "total_spent": 160.89, "cashback": 1.61},
+        ],
+        [{"last_digits": "7197", "total_spent": 1588.36, "cashback": 15.88}],
+    ]
+    assert [len(page["top_transactions"]) for page in pages] == [2, 4, 1]
+    mock_store.assert_called_once()
+    mock_market.assert_called_once()
+    store.close()
+
+
+@patch("src.views.OPERATIONS_FILE", "missing.xlsx")
+def test_get_data_for_home_page_missing_file():
+    """Тестирование отсутствующего файла операций: возвращается сообщение об ошибке загрузки"""
+    assert get_data_for_home_page("2021-12-31 23:59:59", "missing.xlsx") == "Файл не найден"
+    assert get_data_for_home_page_batch(["2021-12-31 23:59:59"]) == "Файл не найден"
+
+
+@patch("src.views.load_transaction_store")
+def test_get_data_for_home_page_batch_no_dates(mock_store):
+    """Тестирование пустого списка дат: данные не загружаются"""
+    assert get_data_for_home_page_batch([]) == []
+    mock_store.assert_not_called()
+
+
+@patch("src.views.load_user_settings")
+@patch("src.views.fetch_market_data")
+@patch("src.views.load_transaction_store")
+def test_get_data_for_home_page_batch_cashback_rules(mock_store, mock_market, mock_settings, tmp_path, df_test):
+    """Тестирование: с правилами кешбэка в настройках пакетный расчет совпадает с расчетом по одной дате"""
+    db_path = str(tmp_path / "transactions.sqlite")
+    with TransactionStore(db_path) as store:
+        store.ingest_frame(df_test)
+    mock_store.side_effect = lambda file_name: TransactionStore(db_path)
+    mock_market.return_value = {"currency_rates": [], "stock_prices": []}
+    rules = {"excluded_categories": ["Переводы"], "rules": [{"categories": ["Такси"], "rate": 5}]}
+    mock_settings.return_value = {"cashback": rules}
+    dates = ["2021-12-20 23:59:59", "2021-12-31 23:59:59", "2024-09-30 00:00:00"]
+
+    pages = [json.loads(page)["cards"] for page in get_data_for_home_page_batch(dates)]
+    assert pages == [json.loads(get_data_for_home_page(date))["cards"] for date in dates]
+    assert pages[1] == [
+        {"last_digits": "5091", "total_spent": 645.78, "cashback": 32.29},
+        {"last_digits": "7197", "total_spent": 160.89, "cashback": 0.0},
+    ]
+
+
+@patch("src.views.fetch_market_data")
+@patch("src.views.load_transaction_store")
+def test_get_data_for_home_page_closes_store(mock_store, mock_market, tmp_path, df_test):
+    """Тестирование: соединение с хранилищем закрывается после формирования ответа"""
+    store = TransactionStore(str(tmp_path / "transactions.sqlite"))
+    store.ingest_frame(df_test)
+    mock_store.return_value = store
+    mock_market.return_value = {"currency_rates": [], "stock_prices": []}
+    get_data_for_home_page("2021-12-31 23:59:59")
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.count()